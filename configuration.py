@@ -16,7 +16,11 @@ SYSTEMS = [
 ]
 GENDERS = ("./resource/male.png", "./resource/female.png")
 DATABASE_PATH = "resource/creature.db"
+# Catalogs managed together, name -> database file, see factory.catalogs
+CATALOGS = {"human": DATABASE_PATH}
 WINDOW_ICON_PATH = "resource/icon.png"
 VALUE_PATH = "resource/periousValue.txt"
 UI_FONTFAMILY = "Microsoft YaHei UI"
 UI_FONTSIZE = 11
+MODEL_CACHE_SIZE = 256
+PREFETCH_COUNT = 5
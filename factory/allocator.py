@@ -0,0 +1,54 @@
+import sqlite3
+from collections.abc import Generator
+
+
+# Each free range is the gap between a value and the next one, a sentinel opens the bucket
+_GAPS = (
+    "SELECT value+1,COALESCE(nxt,:last+1)-1 FROM ("
+    "SELECT value,LEAD(value) OVER (ORDER BY value) AS nxt FROM ("
+    "SELECT :first-1 AS value UNION ALL SELECT value FROM info WHERE value BETWEEN :first AND :last"
+    ")) WHERE COALESCE(nxt,:last+1)-value>1"
+)
+
+
+def bucket(sysid: int, is_parent: int, sex: int) -> tuple[int, int]:
+    """
+    First and last value of a (sysid, is_parent, sex) bucket.
+    """
+    if is_parent:
+        base = (sysid + 10) * 10000 + sex * 1000
+        return base + 1, base + 999
+    base = (sysid + 10) * 100000 + sex * 10000
+    return base, base + 9999
+
+
+def free_ranges(db: sqlite3.Connection, first: int, last: int) -> Generator[tuple[int, int]]:
+    """
+    Unused (lowest, highest) ranges between first and last, in order.
+    """
+    cur = db.cursor()
+    cur.execute(_GAPS, {"first": first, "last": last})
+    yield from cur.fetchall()
+
+
+def allocate(
+        db: sqlite3.Connection, sysid: int, is_parent: int, sex: int, count: int,
+        reserved: set[int], consecutive: bool = False
+) -> list[int]:
+    """
+    The lowest count values of a bucket which are neither used nor reserved.
+    With consecutive, the values form one run.
+    """
+    result = []
+    for lo, hi in free_ranges(db, *bucket(sysid, is_parent, sex)):
+        for value in range(lo, hi + 1):
+            if value in reserved:
+                if consecutive:
+                    result.clear()
+                continue
+            result.append(value)
+            if len(result) == count:
+                return result
+        if consecutive:
+            result.clear()
+    raise ValueError("可用value不足")
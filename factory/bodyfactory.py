@@ -1,9 +1,14 @@
 import json
-import sqlite3
 from collections.abc import Generator
 from model.bodymodel import BodyModel, Sentence
+from model.searchhit import SearchHit
+from factory.navigation import NavigationIndex
+from factory.counterpart import CounterpartIndex
+from factory.cache import ModelCache
+from factory import catalogs, columnar, completion, connection, fulltext, migration, revision, transfer
+from factory.transfer import Progress
 from configuration import (
-    VALUE_PATH, DATABASE_PATH
+    VALUE_PATH, DATABASE_PATH, MODEL_CACHE_SIZE
 )
 
 
@@ -28,36 +33,135 @@ def load_cache_model():
     return value
 
 
+# Tables holding the edited information, and every table
+EXPORT_TABLES = ("attribution", "ia_connect")
+ALL_TABLES = ("info", "info_old_info", "attribution", "ia_connect")
+
+
 class BodyFactory:
-    def __init__(self):
-        self.db = sqlite3.connect(DATABASE_PATH)
+    # Number of search results fetched per query
+    page_size = 200
+
+    def __init__(self, path: str = DATABASE_PATH, readonly: bool = False, shared=None):
+        """
+        readonly: use the read-only connection of the calling thread, for background work.
+        shared: the factory.catalogs.CatalogRegistry whose catalogs hold sentences linked but not stored here,
+        by default the one of configuration.CATALOGS if path is one of them.
+        """
+        self.path = path
+        self.readonly = readonly
+        self.shared = catalogs.registry_for(path) if shared is None else shared
+        self.connections = connection.manager(path)
+        self.cache = ModelCache(MODEL_CACHE_SIZE)
+        self._navigation = None
+        self._counterparts = None
+        if readonly:
+            self.db = self.connections.reader()
+        else:
+            self.db = self.connections.writer()
+            try:
+                migration.migrate(self.db)
+            except BaseException:
+                self.connections.release()
+                raise
 
     def close(self):
-        self.db.close()
+        if not self.readonly:
+            self.connections.release()
 
     def create_by_value(self, value: int):
         """
         Create a model based on id, with original info information.
         """
-        # Seek model name
+        models = self.create_many_by_values((value,))
+        assert len(models) == 1
+        return models[0]
+
+    def create_many_by_values(self, values) -> list[BodyModel]:
+        """
+        Create models for any number of ids, from the cache or with a constant number of queries.
+        Ids missing from the database are skipped, the order of values is kept.
+        """
+        values = list(dict.fromkeys(values))
+        models = {value: self.cache.get(value) for value in values}
+        missing = [value for value, model in models.items() if model is None]
+        if missing:
+            version = self.cache.version
+            loaded = self.load_many_by_values(missing)
+            self.cache.put_many(loaded, version=version)
+            models.update((model.value, model) for model in loaded)
+        return [models[value] for value in values if models[value] is not None]
+
+    def load_many_by_values(self, values) -> list[BodyModel]:
+        """
+        Load models from database with a constant number of queries, the cache is not used.
+        """
+        values = list(dict.fromkeys(values))
+        keys = json.dumps(values)
         cur = self.db.cursor()
-        cur.execute("SELECT name FROM info WHERE value=%d" % value)
-        res = cur.fetchone()
-        assert res is not None
-        # Seek all sentence's hash with order
-        name = res[0]
-        cur.execute("SELECT text_hash FROM ia_connect WHERE model_value=%d ORDER BY order_id" % value)
-        sentence_hashes = [x[0] for x in cur.fetchall()]
-        # Seek sentence text
-        sentences = []
-        for sentence_hash in sentence_hashes:
-            cur.execute("SELECT context FROM attribution WHERE text_hash='%s'" % sentence_hash)
-            try:
-                sentences.append(Sentence(cur.fetchone()[0]))
-            except (TypeError, IndexError):
-                continue
-        # Objective model
-        return BodyModel(value, name, sentences)
+        # Seek model names and revisions
+        cur.execute(
+            "SELECT i.value,i.name,COALESCE(r.revision,0) FROM json_each(?) AS j "
+            "JOIN info AS i ON i.value=j.value "
+            "LEFT JOIN model_revision AS r ON r.value=i.value",
+            (keys,)
+        )
+        rows = cur.fetchall()
+        names = {value: name for value, name, _ in rows}
+        revisions = {value: revision_ for value, _, revision_ in rows}
+        # Seek all sentence's text with order
+        cur.execute(
+            "SELECT c.model_value,c.text_hash,a.context FROM json_each(?) AS j "
+            "JOIN ia_connect AS c ON c.model_value=j.value "
+            "LEFT JOIN attribution AS a ON a.text_hash=c.text_hash "
+            "ORDER BY c.model_value,c.order_id",
+            (keys,)
+        )
+        contexts = {value: [] for value in names}
+        for value, context in self.__resolve(cur.fetchall()):
+            contexts[value].append(context)
+        # Objective models
+        return [
+            BodyModel(value, names[value], contexts[value], revisions[value]) for value in values if value in names
+        ]
+
+    @property
+    def navigation(self) -> NavigationIndex:
+        """
+        Browsing order of all models, loaded on first use.
+        """
+        if self._navigation is None:
+            self._navigation = NavigationIndex(self.db, self.path)
+        return self._navigation
+
+    @property
+    def counterparts(self) -> CounterpartIndex:
+        """
+        Same name models of the other gender, loaded on first use.
+        """
+        if self._counterparts is None:
+            self._counterparts = CounterpartIndex(self.db, self.path)
+        return self._counterparts
+
+    @property
+    def catalog(self) -> columnar.ColumnarCatalog | None:
+        """
+        Columns of all structures for vectorized filters, loaded on first use. None without NumPy.
+        """
+        return columnar.catalog(self.db, self.path)
+
+    def counterpart_model(self, value: int) -> BodyModel | None:
+        """
+        The model with the same name and the other gender, None if there is none.
+        """
+        other = self.counterparts.counterpart(value)
+        return None if other is None else self.create_by_value(other)
+
+    def models_without_counterpart(self, sysid: int | None = None) -> list[int]:
+        """
+        Values of all models having no model with the same name and the other gender.
+        """
+        return self.counterparts.missing(sysid)
 
     def setup_model(self, value: int, direction: int = 0):
         """
@@ -71,174 +175,299 @@ class BodyFactory:
         if not (100000 <= value < 212000 or 1000000 <= value < 2120000):
             raise ValueError
 
-        cur = self.db.cursor()
-        cur.execute(f"SELECT value FROM info ORDER BY sysid,value")
-        values = [x[0] for x in cur.fetchall()]
-        if value in values:
-            idx = values.index(value) + direction
-            idx %= len(values)  # Make sure the index is in range
-            final_val = values[idx]
+        if value in self.navigation:
+            final_val = self.navigation.step(value, direction)
         elif direction == 0:
-            values.sort()  # Adjust order
-            maxidx = len(values)
-            minidx = 0
-            # Dichotomy query the value with the smallest difference
-            while maxidx - minidx > 1:
-                mididx = (maxidx - minidx) // 2 + minidx
-                if values[mididx] > value:
-                    maxidx = mididx
-                else:
-                    minidx = mididx
-
-            if value - values[minidx] < values[maxidx] - value:
-                final_val = values[minidx]
-            else:
-                final_val = values[maxidx]
+            final_val = self.navigation.nearest(value)
         else:
             raise ValueError
 
         return self.create_by_value(final_val)
 
-    def produce_by_search(self, keywords: str, sysid: int | None, filter_model: int) -> Generator[BodyModel]:
+    def produce_hits_by_search(
+            self, keywords: str, sysid: int | None, filter_model: int, after: tuple | None = None
+    ) -> Generator[SearchHit]:
         """
-        According to keywords and system restrictions, search and generate models without sentence information.
+        According to keywords and system restrictions, search a page of models.
+        Keywords are looked up in the name, the old info and the linked sentences, see factory.fulltext.
         filter_model: 0 - all, 1 - hadn't info, 2 - had info
+        after: the last hit of the previous page, None for the first page.
         """
-        cur = self.db.cursor()
-        sql = "SELECT value,name FROM info AS i "
         conditions = []
-        if filter_model:
-            sql += "LEFT JOIN ia_connect AS c ON i.value=c.model_value "
-            if filter_model == 1:
-                conditions.append("c.model_value IS NULL")
-            elif filter_model == 2:
-                conditions.append("c.model_value IS NOT NULL")
-            else:
-                raise ValueError("Param filter_model error")
+        params = []
+        if filter_model == 1:
+            conditions.append("NOT EXISTS (SELECT 1 FROM ia_connect AS c WHERE c.model_value=i.value)")
+        elif filter_model == 2:
+            conditions.append("EXISTS (SELECT 1 FROM ia_connect AS c WHERE c.model_value=i.value)")
+        elif filter_model:
+            raise ValueError("Param filter_model error")
 
         if sysid is not None:
-            conditions.append(f"i.sysid={sysid}")
+            conditions.append("i.sysid=?")
+            params.append(sysid)
 
-        num_limit = 1000
         if len(keywords) > 0:
-            keywords = f"%{keywords}%"
-            conditions.append("i.name LIKE ?")
-            cur.execute(f"{sql}WHERE {' AND '.join(conditions)} LIMIT {num_limit}", (keywords,))
-            sql_result = list(cur.fetchall())
-            number_supplement = num_limit - len(sql_result)
-            if number_supplement > 0:
-                conditions[-1] = "i.name NOT LIKE ?"
-                conditions.append("i.info LIKE ?")
-                cur.execute(f"{sql}WHERE {' AND '.join(conditions)} LIMIT {number_supplement}", (keywords, keywords))
-                sql_result.extend(cur.fetchall())
-
-        elif len(conditions) > 0:
-            cur.execute(f"{sql}WHERE {' AND '.join(conditions)} LIMIT {num_limit}")
-            sql_result = list(cur.fetchall())
-
+            shared_hits = None if self.shared is None else self.shared.sentence_hits(keywords, self.path)
+            sql_result = fulltext.search(self.db, keywords, conditions, params, after, self.page_size, shared_hits)
+        elif (catalog := self.catalog) is not None:
+            catalog.sync(self.db)
+            rows = catalog.browse(sysid, filter_model, None if after is None else after[0], self.page_size)
+            sql_result = [(value, name, fulltext.SOURCE_NAME) for value, name in rows]
         else:
-            cur.execute(f"{sql}LIMIT {num_limit}")
-            sql_result = list(cur.fetchall())
+            # Keyset on (sysid, value) instead of an offset
+            if after is not None:
+                conditions.append("(i.sysid,i.value)>((SELECT sysid FROM info WHERE value=?),?)")
+                params.extend((after[0], after[0]))
+            where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+            cur = self.db.cursor()
+            cur.execute(
+                f"SELECT i.value,i.name,{fulltext.SOURCE_NAME} FROM info AS i {where}"
+                "ORDER BY i.sysid,i.value LIMIT ?",
+                (*params, self.page_size)
+            )
+            sql_result = cur.fetchall()
 
-        for val, name in sql_result:
-            yield BodyModel(val, name, None)
+        for row in sql_result:
+            yield SearchHit(*row)
 
-    def produce_sentences_by_value(self, value: int) -> list[Sentence]:
+    def produce_by_search(self, keywords: str, sysid: int | None, filter_model: int) -> Generator[SearchHit]:
+        """
+        According to keywords and system restrictions, search all models, every page is fetched when it is reached.
+        filter_model: 0 - all, 1 - hadn't info, 2 - had info
+        """
+        after = None
+        while True:
+            page = list(self.produce_hits_by_search(keywords, sysid, filter_model, after))
+            yield from page
+            if len(page) < self.page_size:
+                break
+            after = page[-1]
+
+    def __resolve(self, rows) -> list[tuple]:
+        """
+        Rows of (key, text_hash, context or None) as (key, context).
+        Texts not stored in this database are looked up in the shared catalogs, a text found nowhere is left out,
+        saving the model keeps its link.
+        """
+        missing = [hash_ for _, hash_, context in rows if context is None]
+        found = self.shared.sentences(missing) if missing and self.shared is not None else {}
+        return [
+            (key, found.get(hash_) if context is None else context)
+            for key, hash_, context in rows if context is not None or hash_ in found
+        ]
+
+    def produce_sentences_by_value(self, value: int) -> Generator[Sentence]:
         """
         Load all associated sentences based on model vlaue.
         """
         cur = self.db.cursor()
-        cur.execute(f"SELECT text_hash FROM ia_connect WHERE model_value={value} ORDER BY order_id")
-        for thash in (x[0] for x in cur.fetchall()):
-            cur.execute("SELECT context FROM attribution WHERE text_hash='%s'" % thash)
+        cur.execute(
+            "SELECT c.model_value,c.text_hash,a.context FROM ia_connect AS c "
+            "LEFT JOIN attribution AS a ON a.text_hash=c.text_hash "
+            "WHERE c.model_value=? ORDER BY c.order_id",
+            (value,)
+        )
+        for _, context in self.__resolve(cur.fetchall()):
             try:
-                yield Sentence(cur.fetchone()[0])
-            except TypeError:
+                yield Sentence(context)
+            except (AttributeError, ValueError):
                 continue
 
     def saving_model(self, body: BodyModel):
         """
         Save all relationships of a model.
         """
+        self.saving_models((body,))
+
+    def saving_models(self, bodies):
+        """
+        Save all relationships of many models in a single transaction, nothing is saved if any fails.
+        A model whose revision is known must still be at that revision in the database,
+        otherwise factory.revision.RevisionConflict lists the sentences which diverged.
+        """
+        bodies = list(bodies)
+        values = [body.value for body in bodies]
+        self.cache.invalidate(values)
+        try:
+            saved = revision.immediate(self.db, lambda: self.__write_models(bodies))
+        finally:
+            # A prefetch started during the write may have stored what was there before the commit
+            self.cache.invalidate(values)
+        for body in bodies:
+            body.revision = saved[body.value]
+        if (catalog := columnar.catalog(self.db, self.path, load=False)) is not None:
+            catalog.set_sentences(values, [len(body) for body in bodies], [saved[x] for x in values])
+
+    def __write_models(self, bodies: list[BodyModel]) -> dict[int, int]:
+        """
+        Check revisions and write the changed relationships, inside the write transaction.
+        Returns the new revision of every model.
+        """
         cur = self.db.cursor()
-        # Read existing relationship
-        cur.execute("SELECT text_hash FROM ia_connect WHERE model_value=%d ORDER BY order_id" % body.value)
-        hash_exists = [x[0] for x in cur.fetchall()]
-        idxes_excluded = set()
-
-        # Loop through each sentence
-        for idx_now, sentence in enumerate(body.sentences):
-            hash_now = sentence.gethash
-            # Determine whether the relationship already exists
-            if hash_now in hash_exists:
-                idx_exists = hash_exists.index(hash_now)
-                # Change the sequence number if the sequence changes
-                if idx_exists != idx_now:
-                    cur.execute(
-                        "UPDATE ia_connect SET order_id=? WHERE model_value=? AND text_hash=?",
-                        (idx_now, body.value, hash_now)
-                    )
-                # Record existing sentences that need to be kept
-                idxes_excluded.add(idx_exists)
-                continue
-            # Judge whether the sentence exists, save the sentence if it does not exist
-            cur.execute("SELECT COUNT(*) FROM attribution WHERE text_hash='%s'" % hash_now)
-            if cur.fetchone()[0] == 0:
-                cur.execute(
-                    "INSERT INTO attribution (context,text_hash) VALUES (?,?)", (sentence.value, hash_now)
-                )
-            # Saving relationship
+        keys = json.dumps([body.value for body in bodies])
+        # Read existing relationships of all models at once
+        cur.execute(
+            "SELECT c.model_value,c.text_hash,c.order_id FROM json_each(?) AS j "
+            "JOIN ia_connect AS c ON c.model_value=j.value",
+            (keys,)
+        )
+        exists = {}
+        for value, hash_, order in cur.fetchall():
+            exists.setdefault(value, {})[hash_] = order
+
+        current = revision.revisions(self.db, (body.value for body in bodies))
+        stale = [body for body in bodies if body.revision is not None and body.revision != current[body.value]]
+        if stale:
+            raise revision.RevisionConflict(self.__conflicts(stale, current))
+
+        sentences = {}
+        inserts = []
+        updates = []
+        deletes = []
+        for body in bodies:
+            # hash -> order, a repeated sentence keeps its first position
+            wanted = {}
+            for sentence in body.sentences:
+                hash_now = sentence.gethash
+                if hash_now not in wanted:
+                    wanted[hash_now] = len(wanted)
+                    sentences[hash_now] = sentence.value
+            old = exists.get(body.value, {})
+            for hash_now, idx_now in wanted.items():
+                if hash_now not in old:
+                    inserts.append((body.value, hash_now, idx_now))
+                elif old[hash_now] != idx_now:
+                    updates.append((idx_now, body.value, hash_now))
+            deletes.extend((body.value, hash_) for hash_ in old.keys() - wanted.keys())
+
+        if self.shared is not None and sentences:
+            # A text already stored in another catalog is only linked
             cur.execute(
-                "INSERT INTO ia_connect (model_value,text_hash,order_id) VALUES (?,?,?)",
-                (body.value, hash_now, idx_now)
+                "SELECT j.value FROM json_each(?) AS j WHERE NOT EXISTS "
+                "(SELECT 1 FROM attribution AS a WHERE a.text_hash=j.value)",
+                (json.dumps(list(sentences)),)
             )
-
-        # Remove irrelevant sentence relations
+            for hash_ in self.shared.sentences(x for x, in cur.fetchall()):
+                del sentences[hash_]
         cur.executemany(
-            "DELETE FROM ia_connect WHERE model_value=? AND text_hash=?",
-            ((body.value, hash_) for i, hash_ in enumerate(hash_exists) if i not in idxes_excluded)
+            "INSERT OR IGNORE INTO attribution (context,text_hash) VALUES (?,?)",
+            ((context, hash_) for hash_, context in sentences.items())
         )
-        self.db.commit()
+        if deletes:
+            # A link whose text cannot be read here was never shown, removing it would lose the sentence
+            readable = self.__readable({hash_ for _, hash_ in deletes})
+            deletes = [x for x in deletes if x[1] in readable]
+        cur.executemany("DELETE FROM ia_connect WHERE model_value=? AND text_hash=?", deletes)
+        cur.executemany("UPDATE ia_connect SET order_id=? WHERE model_value=? AND text_hash=?", updates)
+        cur.executemany(
+            "INSERT OR IGNORE INTO ia_connect (model_value,text_hash,order_id) VALUES (?,?,?)", inserts
+        )
+        revision.bump(self.db, current)
+        return {value: number + 1 for value, number in current.items()}
+
+    def __readable(self, hashes) -> set[str]:
+        """
+        The hashes whose text is stored here or in a shared catalog.
+        """
+        cur = self.db.cursor()
+        cur.execute(
+            "SELECT j.value FROM json_each(?) AS j JOIN attribution AS a ON a.text_hash=j.value",
+            (json.dumps(list(hashes)),)
+        )
+        readable = {x for x, in cur.fetchall()}
+        if self.shared is not None:
+            readable.update(self.shared.sentences(set(hashes) - readable))
+        return readable
+
+    def __conflicts(self, stale: list[BodyModel], current: dict[int, int]) -> list[revision.Conflict]:
+        """
+        Sentences only in the database and only in the edited model, for every stale model.
+        """
+        stored = {model.value: model for model in self.load_many_by_values(body.value for body in stale)}
+        conflicts = []
+        for body in stale:
+            theirs = [x.value for x in stored[body.value]] if body.value in stored else []
+            ours = [x.value for x in body]
+            theirs_set, ours_set = set(theirs), set(ours)
+            conflicts.append(revision.Conflict(
+                body.value, current[body.value],
+                tuple(x for x in theirs if x not in ours_set), tuple(x for x in ours if x not in theirs_set)
+            ))
+        return conflicts
 
     def get_old_info(self, value: int) -> str:
         """
         Get old version information.
         """
+        context = self.cache.get_old_info(value)
+        if context is not None:
+            return context
         cur = self.db.cursor()
-        cur.execute("SELECT info FROM info_old_info WHERE value=%d" % value)
+        cur.execute("SELECT info FROM info_old_info WHERE value=?", (value,))
         context = cur.fetchone()
         try:
             context = context[0]
             context.strip()
         except (TypeError, AttributeError):
             context = ""
+        self.cache.put_old_info(value, context)
         return context
 
-    def export_database_json(self, _path):
+    def load_old_infos(self, values) -> dict[int, str]:
         """
-        Export database as json file.
+        Old version information of many models in one query, the cache is not used.
         """
-        tables = {"attribution", "ia_connect"}
         cur = self.db.cursor()
+        cur.execute(
+            "SELECT o.value,o.info FROM json_each(?) AS j JOIN info_old_info AS o ON o.value=j.value",
+            (json.dumps(list(values)),)
+        )
+        contexts = dict.fromkeys(values, "")
+        contexts.update((value, context or "") for value, context in cur.fetchall())
+        return contexts
 
-        def _export(name):
-            cur.execute(f"PRAGMA table_info({name})")
-            keys = [x[1] for x in cur.fetchall()]
-
-            cur.execute(f"SELECT {','.join(keys)} FROM {name}")
-            data = [{k: v for k, v in zip(keys, row)} for row in cur.fetchall()]
-
-            data_json = json.dumps(data, ensure_ascii=False)
-            with open(f"{_path}/{name}.json", 'w', encoding='UTF-8') as f:
-                f.write(data_json)
-
+    def prefetch(self, values):
+        """
+        Load models and old info missing from the cache, with the read-only connection of the calling thread.
+        Meant to run in background, a model saved meanwhile is not stored.
+        """
+        missing = [value for value in values if value not in self.cache]
+        if not missing:
+            return
+        version = self.cache.version
+        reader = BodyFactory(self.path, readonly=True, shared=self.shared)
+        self.cache.put_many(reader.load_many_by_values(missing), reader.load_old_infos(missing), version)
+
+    def export_database_json(self, _path, fmt: str = "json", tables=EXPORT_TABLES) -> dict:
+        """
+        Export tables of database as json files, fmt is one of factory.transfer.FORMATS.
+        Returns a dictionary of exported rows and rows per second.
+        e.q:{table_name: (number, speed)}
+        """
+        statistics = {}
         for key in tables:
-            _export(key)
-        return tables
+            extra = self.__shared_sentences() if key == "attribution" and self.shared is not None else ()
+            number, seconds = transfer.export_table(self.db, key, _path, fmt, extra=extra)
+            statistics[key] = (number, number / seconds if seconds else 0)
+        return statistics
+
+    def __shared_sentences(self) -> list[dict]:
+        """
+        Rows of the attribution table for the sentences linked here whose text is stored in another catalog.
+        """
+        cur = self.db.cursor()
+        cur.execute(
+            "SELECT DISTINCT c.text_hash FROM ia_connect AS c "
+            "WHERE NOT EXISTS (SELECT 1 FROM attribution AS a WHERE a.text_hash=c.text_hash)"
+        )
+        found = self.shared.sentences(x for x, in cur.fetchall())
+        return [{"context": context, "text_hash": hash_} for hash_, context in found.items()]
 
-    def import_database_from_json(self, _path) -> dict:
+    def import_database_from_json(self, _path, batch_size: int = 1000, progress: Progress | None = None) -> dict:
         """
-        Import database from json file.
+        Import database from json files, either a json array or NDJSON per table, may be compressed.
+        Rows are streamed and committed every batch_size rows, existing rows are skipped.
+        progress(table, rows read, bytes read, file size) may return False to cancel the import.
         Returns a dictionary consisting of imported data volumes.
         e.q:{table_name: number}
         """
@@ -246,37 +475,15 @@ class BodyFactory:
             "attribution": 0,
             "ia_connect": 0
         }
-        table_unique_fields = {
-            "attribution": ["text_hash", "context"],
-            "ia_connect": ["model_value", "text_hash"]
-        }
-
-        def _insert(name):
-            with open(f"{_path}/{name}.json", "r", encoding="UTF-8") as f:
-                data = f.read().strip()
-                data = json.loads(data)
-            count = 0
-            for row in data:
-                # Query for duplicate items, and exclude fields with empty values when querying.
-                cur.execute(
-                    "SELECT COUNT(*) FROM {} WHERE {}".format(
-                        name, ' AND '.join(f'{field}=:{field}' for field in table_unique_fields[name])
-                    ),
-                    row
-                )
-                if cur.fetchone()[0] > 0:
-                    continue
-                cur.execute(
-                    f"INSERT INTO {name} ({','.join(row)}) VALUES ({','.join(f':{field}' for field in row)})",
-                    row
-                )
-                self.db.commit()
-                count += 1
-            return count
-
-        cur = self.db.cursor()
         for key in tables_count:
-            tables_count[key] = _insert(key)
+            filename = transfer.find_table_file(_path, key)
+            if filename is None:
+                raise FileNotFoundError(f"{key}.json")
+            tables_count[key], finished = transfer.import_table(self.db, key, filename, batch_size, progress)
+            if not finished:
+                break
+        # Sentence counts changed in bulk, the catalog is read again when needed
+        columnar.discard(self.path)
         return tables_count
 
     def percentage_of_progress_completed(self, sysid: int | None, gender: int | None) -> int:
@@ -284,21 +491,12 @@ class BodyFactory:
         Calculate the percentage complete of a system.
         :return: Integer part of a percentage
         """
-        condition = ""
-        if sysid is not None:
-            condition += f" WHERE sysid={sysid}"
-        if gender is not None:
-            condition += " AND " if condition else " WHERE "
-            condition += f"sex={gender}"
+        return completion.percentage(self.progress_matrix(), sysid, gender)
 
-        cur = self.db.cursor()
-        cur.execute(f"SELECT value FROM info" + condition)
-        values = [str(x[0]) for x in cur.fetchall()]
-
-        cur.execute(f"SELECT COUNT(DISTINCT model_value) FROM ia_connect WHERE model_value IN ({','.join(values)})")
-        number = cur.fetchone()[0]
-
-        percentage = int(number / len(values) * 100)
-        if percentage > 100:
-            percentage = 100
-        return percentage
+    def progress_matrix(self) -> dict[tuple[int, int], tuple[int, int]]:
+        """
+        Completed and total number of models of every system and gender, see factory.completion.
+        Read from the counters kept by triggers, so the saves of every editor are counted.
+        e.q:{(sysid, sex): (completed, total)}
+        """
+        return completion.matrix(self.db)
@@ -0,0 +1,65 @@
+import threading
+from collections import OrderedDict
+from model.bodymodel import BodyModel
+
+
+class ModelCache:
+    """
+    Least recently used models, kept as immutable snapshots so editing a returned model never changes the cache.
+    Shared between the GUI thread and the prefetching thread.
+    """
+    def __init__(self, size: int):
+        self.size = size
+        # value -> (name, texts of sentences, old info or None, revision)
+        self._items: OrderedDict[int, tuple[str, tuple[str, ...], str | None, int | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Increased by every invalidation, a load started before is not stored
+        self.version = 0
+
+    def __contains__(self, value):
+        return value in self._items
+
+    def get(self, value: int) -> BodyModel | None:
+        with self._lock:
+            item = self._items.get(value)
+            if item is None:
+                return None
+            self._items.move_to_end(value)
+        return BodyModel(value, item[0], item[1], item[3])
+
+    def get_old_info(self, value: int) -> str | None:
+        with self._lock:
+            item = self._items.get(value)
+        return None if item is None else item[2]
+
+    def put_many(self, models, old_infos: dict[int, str] | None = None, version: int | None = None):
+        """
+        Store loaded models, unless the cache was invalidated since version was read.
+        """
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            for model in models:
+                old_info = None
+                if old_infos is not None:
+                    old_info = old_infos.get(model.value)
+                elif model.value in self._items:
+                    old_info = self._items[model.value][2]
+                self._items[model.value] = (
+                    model.name, tuple(x.value for x in model.sentences), old_info, model.revision
+                )
+                self._items.move_to_end(model.value)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def put_old_info(self, value: int, context: str):
+        with self._lock:
+            item = self._items.get(value)
+            if item is not None:
+                self._items[value] = (item[0], item[1], context, item[3])
+
+    def invalidate(self, values):
+        with self._lock:
+            self.version += 1
+            for value in values:
+                self._items.pop(value, None)
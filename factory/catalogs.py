@@ -0,0 +1,260 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import pathname2url
+from factory import connection, fulltext, migration, trace
+from model.searchhit import SearchHit
+from configuration import CATALOGS
+
+
+# A catalog name is also its schema name on the attached connection
+NAME_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+RESERVED = ("main", "temp")
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default() -> "CatalogRegistry":
+    """
+    The registry of configuration.CATALOGS, shared by every factory in the process.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = CatalogRegistry()
+        return _default
+
+
+def registry_for(path: str) -> "CatalogRegistry | None":
+    """
+    The registry a factory of path shares sentences through, None unless path is one of several catalogs.
+    """
+    if len(CATALOGS) < 2:
+        return None
+    path = os.path.abspath(path)
+    if path not in (os.path.abspath(x) for x in CATALOGS.values()):
+        return None
+    return default()
+
+
+def shutdown():
+    """
+    Close the default registry if it was opened, a later use opens it again.
+    """
+    global _default
+    with _default_lock:
+        registry, _default = _default, None
+    if registry is not None:
+        registry.close()
+
+
+class CatalogRegistry:
+    """
+    Several catalogs, e.g. species or atlases, each kept in its own database file.
+    They are read together through one connection per thread with every catalog ATTACHed read-only,
+    or by parallel read connections of their own. Only factories opened for writing migrate a catalog.
+    A sentence is stored once: a catalog may link a text_hash whose text lies in another catalog.
+    Factories of the catalogs find such texts through the registry, see BodyFactory.
+    """
+    def __init__(self, catalogs: dict[str, str] | None = None):
+        self.paths = dict(CATALOGS if catalogs is None else catalogs)
+        if not self.paths:
+            raise ValueError("No catalog")
+        for name in self.paths:
+            if not NAME_PATTERN.fullmatch(name) or name.lower() in RESERVED:
+                raise ValueError(f"Invalid catalog name: {name}")
+        probe = sqlite3.connect(":memory:")
+        limit = probe.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        probe.close()
+        if len(self.paths) > limit:
+            raise ValueError(f"At most {limit} catalogs can be attached, {len(self.paths)} given")
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def close(self):
+        """
+        Close the attached connections of every thread.
+        """
+        with self._lock:
+            for db in self._connections:
+                db.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    @property
+    def names(self) -> list[str]:
+        return list(self.paths)
+
+    def select(self, names=None) -> list[str]:
+        """
+        The given catalog names in registry order, all of them for None.
+        """
+        if names is None:
+            return self.names
+        names = set(names)
+        unknown = names.difference(self.paths)
+        if unknown:
+            raise KeyError(f"unknown catalogs: {', '.join(sorted(unknown))}")
+        return [name for name in self.paths if name in names]
+
+    def factory(self, name: str, readonly: bool = False):
+        """
+        A factory of one catalog, its models may use sentences stored in the other catalogs.
+        """
+        from factory.bodyfactory import BodyFactory
+        return BodyFactory(self.paths[self.select((name,))[0]], readonly, shared=self)
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        The connection of the calling thread, every catalog is attached read-only under its name.
+        A catalog which is missing or not migrated yet is refused, reading never writes to a catalog.
+        """
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            return db
+        for path in self.paths.values():
+            if not os.path.isfile(path):
+                raise FileNotFoundError(path)
+        db = sqlite3.connect("file::memory:", uri=True, timeout=connection.BUSY_TIMEOUT, check_same_thread=False)
+        try:
+            for name, path in self.paths.items():
+                db.execute(f"ATTACH DATABASE ? AS {name}", (f"file:{pathname2url(os.path.abspath(path))}?mode=ro",))
+                cur = db.execute(f"PRAGMA {name}.user_version")
+                version = cur.fetchone()[0]
+                if version != migration.SCHEMA_VERSION:
+                    raise ValueError(
+                        f"Catalog {name} is at schema version {version} instead of {migration.SCHEMA_VERSION}, "
+                        "open it for writing once to migrate it"
+                    )
+            for pragma in connection.PRAGMAS:
+                db.execute(pragma)
+        except BaseException:
+            db.close()
+            raise
+        trace.recorder.attach(db)
+        with self._lock:
+            self._connections.append(db)
+        self._local.db = db
+        return db
+
+    def release(self):
+        """
+        Close the connection of the calling thread, for threads which end.
+        """
+        db = getattr(self._local, "db", None)
+        if db is None:
+            return
+        self._local.db = None
+        with self._lock:
+            if db in self._connections:
+                self._connections.remove(db)
+        db.close()
+
+    def __others(self, path: str | None) -> list[str]:
+        path = None if path is None else os.path.abspath(path)
+        return [name for name, x in self.paths.items() if os.path.abspath(x) != path]
+
+    def sentences(self, hashes, names=None) -> dict[str, str]:
+        """
+        Texts of the given sentence hashes, looked up in every selected catalog with one query.
+        Hashes stored nowhere are missing from the result.
+        """
+        hashes = list(dict.fromkeys(hashes))
+        if not hashes:
+            return {}
+        keys = json.dumps(hashes)
+        selected = self.select(names)
+        sql = " UNION ALL ".join(
+            f"SELECT a.text_hash,a.context FROM json_each(?) AS j JOIN {name}.attribution AS a ON a.text_hash=j.value"
+            for name in selected
+        )
+        cur = self.connect().cursor()
+        cur.execute(sql, (keys,) * len(selected))
+        contexts = {}
+        for hash_, context in cur.fetchall():
+            contexts.setdefault(hash_, context)
+        return contexts
+
+    def sentence_hits(self, keywords: str, exclude: str | None = None) -> list[tuple[str, float]]:
+        """
+        (text_hash, score) of the sentences containing the keywords in every catalog but the one at exclude,
+        with one query, see factory.fulltext.
+        """
+        selected = self.__others(exclude)
+        if not selected:
+            return []
+        parts = [fulltext.sentence_hits(keywords, name) for name in selected]
+        cur = self.connect().cursor()
+        cur.execute(
+            " UNION ALL ".join(sql for sql, _ in parts),
+            [x for _, params in parts for x in params]
+        )
+        return cur.fetchall()
+
+    def progress(self, names=None) -> dict[str, dict[tuple[int, int], tuple[int, int]]]:
+        """
+        Completed and total number of models of every system and gender of every catalog, in one query.
+        e.q:{catalog: {(sysid, sex): (completed, total)}}
+        """
+        selected = self.select(names)
+        sql = " UNION ALL ".join(
+            f"SELECT {i},sysid,sex,completed,total FROM {name}.progress_stats" for i, name in enumerate(selected)
+        )
+        cur = self.connect().cursor()
+        cur.execute(sql)
+        result = {name: {} for name in selected}
+        for i, sysid, sex, completed, total in cur.fetchall():
+            if total:
+                result[selected[i]][(sysid, sex)] = (completed, total)
+        return result
+
+    def _fan_out(self, func, names) -> dict:
+        """
+        func(factory) of every selected catalog, in parallel threads each reading with its own connection,
+        closed when the thread is done.
+        """
+        selected = self.select(names)
+        # Refuses missing or outdated catalogs before any thread starts
+        self.connect()
+
+        def _run(name):
+            factory = self.factory(name, readonly=True)
+            try:
+                return func(name, factory)
+            finally:
+                factory.connections.release_reader()
+                self.release()
+
+        with ThreadPoolExecutor(max_workers=len(selected), thread_name_prefix="catalog") as pool:
+            return dict(zip(selected, pool.map(_run, selected)))
+
+    def search(self, keywords: str, sysid: int | None, filter_model: int, names=None) -> list[tuple[str, SearchHit]]:
+        """
+        (catalog, hit) of all models of the selected catalogs, see BodyFactory.produce_by_search.
+        Ordered by source and rank, then by catalog.
+        A sentence is found in every catalog linking it, wherever its text is stored.
+        """
+        found = self._fan_out(
+            lambda name, factory: list(factory.produce_by_search(keywords, sysid, filter_model)), names
+        )
+        hits = [(name, hit) for name, page in found.items() for hit in page]
+        hits.sort(key=lambda x: (x[1].source, x[1].rank))
+        return hits
+
+    def export(self, folder: str, fmt: str, tables, names=None) -> dict[str, dict]:
+        """
+        Export the tables of every selected catalog into a subfolder named after it.
+        The exported sentences include the texts linked from other catalogs, every folder can be imported alone.
+        e.q:{catalog: {table_name: (number, speed)}}
+        """
+        def _export(name, factory):
+            path = os.path.join(folder, name)
+            os.makedirs(path, exist_ok=True)
+            return factory.export_database_json(path, fmt, tables)
+
+        return self._fan_out(_export, names)
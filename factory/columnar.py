@@ -0,0 +1,267 @@
+import json
+import os
+import sqlite3
+import threading
+from factory.navigation import register
+from factory.revision import structure_revision
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+_catalogs: dict[str, "ColumnarCatalog"] = {}
+_catalogs_lock = threading.Lock()
+
+
+def available() -> bool:
+    return np is not None
+
+
+def catalog(db: sqlite3.Connection, path: str, load: bool = True) -> "ColumnarCatalog | None":
+    """
+    The catalog of the database at path, shared by every factory in the process.
+    None without NumPy, or if it is not loaded yet and load is False.
+    """
+    if np is None:
+        return None
+    path = os.path.abspath(path)
+    with _catalogs_lock:
+        if path not in _catalogs and load:
+            _catalogs[path] = ColumnarCatalog(db, path)
+        return _catalogs.get(path)
+
+
+def discard(path: str):
+    """
+    Forget the catalog of path, it is loaded again when next needed.
+    """
+    with _catalogs_lock:
+        _catalogs.pop(os.path.abspath(path), None)
+
+
+def _data_version(db: sqlite3.Connection) -> int:
+    """
+    Changes whenever another connection commits to the database of db.
+    """
+    cur = db.cursor()
+    cur.execute("PRAGMA data_version")
+    return cur.fetchone()[0]
+
+
+def decode(values) -> tuple:
+    """
+    (sysid, sex, is_parent) arrays decoded from values, as Structure does for one value.
+    """
+    is_parent = values < 1000000
+    scale = np.where(is_parent, 1000, 10000)
+    sex = values // scale % 10
+    sysid = values // (scale * 10) - 10
+    return sysid.astype(np.int16), sex.astype(np.int8), is_parent
+
+
+class ColumnarCatalog:
+    """
+    Every structure of the info table as NumPy columns, sorted by value, loaded once.
+    value/pval/sysid/sex/is_parent/sentences/revision: one entry per structure;
+    name_offsets/name_lengths: where the UTF-8 name of a structure lies in name_buffer;
+    order: row indexes in browsing order (sysid, value), rank: the position of each row in order.
+    Saves of this process update the sentence counts, those of other connections are taken in by sync.
+    """
+    def __init__(self, db: sqlite3.Connection, path: str):
+        self.path = os.path.abspath(path)
+        self._lock = threading.RLock()
+        # id of a connection -> (connection, its data_version when last synced)
+        self._synced: dict[int, tuple[sqlite3.Connection, int]] = {}
+        self._load(db)
+        register(self)
+
+    def _load(self, db: sqlite3.Connection):
+        """
+        Read every column from db.
+        """
+        cur = db.cursor()
+        # Read first, a commit while the columns are read makes the next sync look again
+        version = _data_version(db)
+        self.structures = structure_revision(db)
+        cur.execute("SELECT value,pval,name FROM info ORDER BY value")
+        rows = cur.fetchall()
+        self.value = np.fromiter((x[0] for x in rows), dtype=np.int64, count=len(rows))
+        self.pval = np.fromiter((x[1] or 0 for x in rows), dtype=np.int64, count=len(rows))
+        self.sysid, self.sex, self.is_parent = decode(self.value)
+        names = [(x[2] or "").encode("UTF-8") for x in rows]
+        self.name_lengths = np.fromiter((len(x) for x in names), dtype=np.int64, count=len(names))
+        self.name_offsets = np.cumsum(self.name_lengths) - self.name_lengths
+        self.name_buffer = bytearray(b"".join(names))
+
+        self.sentences = np.zeros(len(rows), dtype=np.int32)
+        self.revision = np.zeros(len(rows), dtype=np.int64)
+        cur.execute("SELECT model_value,COUNT(*) FROM ia_connect GROUP BY model_value")
+        counts = cur.fetchall()
+        if counts:
+            self.set_sentences([x[0] for x in counts], [x[1] for x in counts])
+        cur.execute("SELECT value,revision FROM model_revision ORDER BY value")
+        revisions = cur.fetchall()
+        if revisions:
+            revision_rows, found = self._rows([x[0] for x in revisions])
+            self.revision[revision_rows] = np.array([x[1] for x in revisions], dtype=np.int64)[found]
+        self._synced[id(db)] = (db, version)
+        self._sort()
+
+    def __len__(self):
+        return len(self.value)
+
+    def _sort(self):
+        self.order = np.lexsort((self.value, self.sysid))
+        self.rank = np.empty_like(self.order)
+        self.rank[self.order] = np.arange(len(self.order))
+
+    def _rows(self, values):
+        """
+        Row indexes of known values, unknown values are dropped.
+        """
+        values = np.asarray(values, dtype=np.int64)
+        rows = np.searchsorted(self.value, values)
+        rows = np.minimum(rows, max(len(self.value) - 1, 0))
+        found = self.value[rows] == values if len(self.value) else np.zeros(len(values), dtype=bool)
+        return rows[found], found
+
+    def name(self, row: int) -> str:
+        start = self.name_offsets[row]
+        return self.name_buffer[start:start + self.name_lengths[row]].decode("UTF-8")
+
+    def add_structures(self, strucs):
+        """
+        Insert new structures, the columns are rebuilt once for all of them.
+        """
+        with self._lock:
+            strucs = sorted((x for x in strucs if not len(self._rows((x.value,))[0])), key=lambda x: x.value)
+            if not strucs:
+                return
+            values = np.array([x.value for x in strucs], dtype=np.int64)
+            names = [x.name.encode("UTF-8") for x in strucs]
+            lengths = np.array([len(x) for x in names], dtype=np.int64)
+            offsets = len(self.name_buffer) + np.cumsum(lengths) - lengths
+            self.name_buffer.extend(b"".join(names))
+            sysid, sex, is_parent = decode(values)
+            at = np.searchsorted(self.value, values)
+            self.value = np.insert(self.value, at, values)
+            self.pval = np.insert(self.pval, at, [x.pval for x in strucs])
+            self.sysid = np.insert(self.sysid, at, sysid)
+            self.sex = np.insert(self.sex, at, sex)
+            self.is_parent = np.insert(self.is_parent, at, is_parent)
+            self.sentences = np.insert(self.sentences, at, 0)
+            self.revision = np.insert(self.revision, at, 0)
+            self.name_offsets = np.insert(self.name_offsets, at, offsets)
+            self.name_lengths = np.insert(self.name_lengths, at, lengths)
+            self._sort()
+
+    def set_sentences(self, values, counts, revisions=None):
+        """
+        Record the number of sentences of saved models, and their revisions if known.
+        """
+        with self._lock:
+            rows, found = self._rows(values)
+            self.sentences[rows] = np.asarray(counts, dtype=np.int32)[found]
+            if revisions is not None:
+                self.revision[rows] = np.asarray(revisions, dtype=np.int64)[found]
+
+    def sync(self, db: sqlite3.Connection):
+        """
+        Take in the structures and the models saved through other connections, as seen by db.
+        Nothing is read unless another connection committed since the last sync with db,
+        then every column is read again if a structure changed, otherwise the revisions tell which models to count again.
+        """
+        version = _data_version(db)
+        with self._lock:
+            known = self._synced.get(id(db))
+            if known is not None and known[0] is db and known[1] == version:
+                return
+            if structure_revision(db) != self.structures:
+                self._load(db)
+                return
+            cur = db.cursor()
+            cur.execute("SELECT value,revision FROM model_revision ORDER BY value")
+            revisions = cur.fetchall()
+            if revisions:
+                values = np.fromiter((x[0] for x in revisions), dtype=np.int64, count=len(revisions))
+                numbers = np.fromiter((x[1] for x in revisions), dtype=np.int64, count=len(revisions))
+                rows, found = self._rows(values)
+                changed = self.revision[rows] != numbers[found]
+                if changed.any():
+                    changed_values = values[found][changed].tolist()
+                    cur.execute(
+                        "SELECT j.value,COUNT(c.model_value) FROM json_each(?) AS j "
+                        "LEFT JOIN ia_connect AS c ON c.model_value=j.value GROUP BY j.value",
+                        (json.dumps(changed_values),)
+                    )
+                    counts = dict(cur.fetchall())
+                    self.sentences[rows[changed]] = [counts.get(x, 0) for x in changed_values]
+                    self.revision[rows[changed]] = numbers[found][changed]
+            self._synced[id(db)] = (db, version)
+
+    def mask(self, sysid: int | None = None, sex: int | None = None, is_parent: bool | None = None,
+             filter_model: int = 0, pval: int | None = None):
+        """
+        Boolean column of the structures matching every given condition.
+        filter_model: 0 - all, 1 - hadn't info, 2 - had info
+        """
+        with self._lock:
+            selected = np.ones(len(self.value), dtype=bool)
+            if sysid is not None:
+                selected &= self.sysid == sysid
+            if sex is not None:
+                selected &= self.sex == sex
+            if is_parent is not None:
+                selected &= self.is_parent == is_parent
+            if pval is not None:
+                selected &= self.pval == pval
+            if filter_model == 1:
+                selected &= self.sentences == 0
+            elif filter_model == 2:
+                selected &= self.sentences > 0
+            elif filter_model:
+                raise ValueError("Param filter_model error")
+            return selected
+
+    def filter(self, **conditions):
+        """
+        Values of the structures matching the conditions of mask, ascending.
+        """
+        with self._lock:
+            return self.value[self.mask(**conditions)]
+
+    def count(self, **conditions) -> int:
+        return int(np.count_nonzero(self.mask(**conditions)))
+
+    def browse(self, sysid: int | None, filter_model: int, after: int | None, limit: int) -> list[tuple[int, str]]:
+        """
+        (value, name) of a page in browsing order, after: the last value of the previous page.
+        """
+        with self._lock:
+            selected = self.mask(sysid=sysid, filter_model=filter_model)[self.order]
+            start = 0
+            if after is not None:
+                rows, _ = self._rows((after,))
+                if len(rows):
+                    start = int(self.rank[rows[0]]) + 1
+            positions = np.flatnonzero(selected[start:])[:limit] + start
+            return [(int(self.value[row]), self.name(row)) for row in self.order[positions]]
+
+    def group_counts(self) -> dict[tuple[int, int], tuple[int, int]]:
+        """
+        Completed and total number of structures of every system and gender, see factory.completion.
+        e.q:{(sysid, sex): (completed, total)}
+        """
+        with self._lock:
+            if not len(self.value):
+                return {}
+            # sysid and sex are single small numbers, one bincount over sysid*10+sex groups them
+            keys = self.sysid.astype(np.int64) * 10 + self.sex
+            totals = np.bincount(keys)
+            completed = np.bincount(keys, weights=self.sentences > 0, minlength=len(totals))
+            return {
+                (key // 10, key % 10): (int(completed[key]), int(totals[key]))
+                for key in np.flatnonzero(totals).tolist()
+            }
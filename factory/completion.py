@@ -0,0 +1,99 @@
+import sqlite3
+
+
+# Number of models and of models having sentences per (sysid, sex), kept by triggers
+SCHEMA = (
+    "CREATE TABLE progress_stats ("
+    "sysid INTEGER NOT NULL, sex INTEGER NOT NULL, "
+    "total INTEGER NOT NULL DEFAULT 0, completed INTEGER NOT NULL DEFAULT 0, "
+    "PRIMARY KEY (sysid, sex))",
+    # A model is added or removed
+    "CREATE TRIGGER progress_stats_info_ai AFTER INSERT ON info BEGIN "
+    "INSERT INTO progress_stats (sysid,sex,total,completed) VALUES (new.sysid,new.sex,1,"
+    "EXISTS (SELECT 1 FROM ia_connect WHERE model_value=new.value)) "
+    "ON CONFLICT (sysid,sex) DO UPDATE SET total=total+1,completed=completed+excluded.completed; END",
+    "CREATE TRIGGER progress_stats_info_ad AFTER DELETE ON info BEGIN "
+    "UPDATE progress_stats SET total=total-1,"
+    "completed=completed-EXISTS (SELECT 1 FROM ia_connect WHERE model_value=old.value) "
+    "WHERE sysid=old.sysid AND sex=old.sex; END",
+    "CREATE TRIGGER progress_stats_info_au AFTER UPDATE OF value,sysid,sex ON info BEGIN "
+    "UPDATE progress_stats SET total=total-1,"
+    "completed=completed-EXISTS (SELECT 1 FROM ia_connect WHERE model_value=old.value) "
+    "WHERE sysid=old.sysid AND sex=old.sex; "
+    "INSERT INTO progress_stats (sysid,sex,total,completed) VALUES (new.sysid,new.sex,1,"
+    "EXISTS (SELECT 1 FROM ia_connect WHERE model_value=new.value)) "
+    "ON CONFLICT (sysid,sex) DO UPDATE SET total=total+1,completed=completed+excluded.completed; END",
+    # A model gets its first sentence or loses its last one
+    "CREATE TRIGGER progress_stats_connect_ai AFTER INSERT ON ia_connect "
+    "WHEN (SELECT COUNT(*) FROM ia_connect WHERE model_value=new.model_value)=1 BEGIN "
+    "UPDATE progress_stats SET completed=completed+1 "
+    "WHERE (sysid,sex)=(SELECT sysid,sex FROM info WHERE value=new.model_value); END",
+    "CREATE TRIGGER progress_stats_connect_ad AFTER DELETE ON ia_connect "
+    "WHEN NOT EXISTS (SELECT 1 FROM ia_connect WHERE model_value=old.model_value) BEGIN "
+    "UPDATE progress_stats SET completed=completed-1 "
+    "WHERE (sysid,sex)=(SELECT sysid,sex FROM info WHERE value=old.model_value); END",
+    "CREATE TRIGGER progress_stats_connect_au AFTER UPDATE OF model_value ON ia_connect "
+    "WHEN old.model_value!=new.model_value BEGIN "
+    "UPDATE progress_stats SET completed=completed-1 "
+    "WHERE NOT EXISTS (SELECT 1 FROM ia_connect WHERE model_value=old.model_value) "
+    "AND (sysid,sex)=(SELECT sysid,sex FROM info WHERE value=old.model_value); "
+    "UPDATE progress_stats SET completed=completed+1 "
+    "WHERE (SELECT COUNT(*) FROM ia_connect WHERE model_value=new.model_value)=1 "
+    "AND (sysid,sex)=(SELECT sysid,sex FROM info WHERE value=new.model_value); END",
+)
+
+TRIGGERS = (
+    "progress_stats_info_ai", "progress_stats_info_ad", "progress_stats_info_au",
+    "progress_stats_connect_ai", "progress_stats_connect_ad", "progress_stats_connect_au",
+)
+
+
+def ensure(db: sqlite3.Connection):
+    """
+    Create and fill the summary table if the database has none yet.
+    """
+    cur = db.cursor()
+    cur.execute("SELECT COUNT(*) FROM sqlite_master WHERE name='progress_stats'")
+    if cur.fetchone()[0] == 0:
+        rebuild(db)
+
+
+def rebuild(db: sqlite3.Connection):
+    """
+    Recreate the summary table and its triggers, counting all existing models.
+    """
+    with db:
+        db.execute("DROP TABLE IF EXISTS progress_stats")
+        for name in TRIGGERS:
+            db.execute(f"DROP TRIGGER IF EXISTS {name}")
+        for sql in SCHEMA:
+            db.execute(sql)
+        db.execute(
+            "INSERT INTO progress_stats (sysid,sex,total,completed) "
+            "SELECT sysid,sex,COUNT(*),SUM(EXISTS (SELECT 1 FROM ia_connect WHERE model_value=i.value)) "
+            "FROM info AS i GROUP BY sysid,sex"
+        )
+
+
+def matrix(db: sqlite3.Connection) -> dict[tuple[int, int], tuple[int, int]]:
+    """
+    All counters in one read.
+    e.q:{(sysid, sex): (completed, total)}
+    """
+    cur = db.cursor()
+    cur.execute("SELECT sysid,sex,completed,total FROM progress_stats")
+    return {(sysid, sex): (completed, total) for sysid, sex, completed, total in cur.fetchall()}
+
+
+def percentage(counters: dict, sysid: int | None, gender: int | None) -> int:
+    """
+    Integer part of the percentage complete, None selects every system or gender.
+    """
+    completed = total = 0
+    for (_sysid, _sex), (_completed, _total) in counters.items():
+        if (sysid is None or sysid == _sysid) and (gender is None or gender == _sex):
+            completed += _completed
+            total += _total
+    if total == 0:
+        return 0
+    return min(int(completed / total * 100), 100)
@@ -0,0 +1,111 @@
+import os
+import sqlite3
+import threading
+from urllib.request import pathname2url
+from factory import fulltext, trace
+
+
+# Applied to every connection, journal_mode is stored in the database file
+PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16384",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+)
+# Seconds to wait for a lock held by another connection
+BUSY_TIMEOUT = 5.0
+# Prepared statements kept per connection
+STATEMENT_CACHE = 256
+
+_managers: dict[str, "ConnectionManager"] = {}
+_managers_lock = threading.Lock()
+
+
+def manager(path: str) -> "ConnectionManager":
+    """
+    The connection manager of a database file, shared by every factory in the process.
+    """
+    path = os.path.abspath(path)
+    with _managers_lock:
+        if path not in _managers:
+            _managers[path] = ConnectionManager(path)
+        return _managers[path]
+
+
+class ConnectionManager:
+    """
+    One writing connection for the GUI thread, plus one read-only connection per background thread.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._writer = None
+        self._users = 0
+        self._local = threading.local()
+        self._readers = []
+        self._lock = threading.Lock()
+
+    def _connect(self, readonly: bool) -> sqlite3.Connection:
+        if readonly:
+            db = sqlite3.connect(
+                f"file:{pathname2url(self.path)}?mode=ro", uri=True, timeout=BUSY_TIMEOUT,
+                cached_statements=STATEMENT_CACHE, check_same_thread=False
+            )
+        else:
+            db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, cached_statements=STATEMENT_CACHE)
+            # Readers no longer block the writer, nor the writer readers
+            db.execute("PRAGMA journal_mode=WAL")
+        for pragma in PRAGMAS:
+            db.execute(pragma)
+        fulltext.register(db)
+        trace.recorder.attach(db)
+        return db
+
+    def writer(self) -> sqlite3.Connection:
+        """
+        The shared writing connection, every call must be paired with release.
+        """
+        if self._writer is None:
+            self._writer = self._connect(readonly=False)
+        self._users += 1
+        return self._writer
+
+    def reader(self) -> sqlite3.Connection:
+        """
+        The read-only connection of the calling thread.
+        """
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = self._connect(readonly=True)
+            with self._lock:
+                self._readers.append(db)
+        return db
+
+    def release_reader(self):
+        """
+        Close the read-only connection of the calling thread, for threads which end.
+        """
+        db = getattr(self._local, "db", None)
+        if db is None:
+            return
+        self._local.db = None
+        with self._lock:
+            self._readers.remove(db)
+        db.close()
+
+    def release(self):
+        """
+        Close all connections once the last user of the writer is gone.
+        """
+        self._users -= 1
+        if self._users > 0:
+            return
+        with _managers_lock:
+            if _managers.get(self.path) is self:
+                del _managers[self.path]
+        with self._lock:
+            for db in self._readers:
+                db.close()
+            self._readers.clear()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
@@ -0,0 +1,64 @@
+import os
+import sqlite3
+from model.structure import Structure
+from factory.navigation import register
+
+
+class CounterpartIndex:
+    """
+    The model of the other gender with the same name, built once per session.
+    names: value -> name;
+    groups: (name, gender) -> values with that name and gender, ascending.
+    The gender is decoded from the value, as Structure.gender does.
+    """
+    def __init__(self, db: sqlite3.Connection, path: str):
+        self.path = os.path.abspath(path)
+        cur = db.cursor()
+        cur.execute("SELECT value,name FROM info ORDER BY value")
+        self.names: dict[int, str] = {}
+        self.groups: dict[tuple[str, int], list[int]] = {}
+        for value, name in cur.fetchall():
+            self.add(Structure(value, name, 0))
+        register(self)
+
+    def add(self, struc: Structure):
+        if struc.value in self.names:
+            return
+        self.names[struc.value] = struc.name
+        group = self.groups.setdefault((struc.name, struc.gender()), [])
+        group.append(struc.value)
+        if len(group) > 1 and group[-2] > struc.value:
+            group.sort()
+
+    def add_structures(self, strucs):
+        for struc in strucs:
+            self.add(struc)
+
+    def counterpart(self, value: int) -> int | None:
+        """
+        The value of the same name and the other gender, one of the same system and kind first.
+        """
+        name = self.names.get(value)
+        if name is None:
+            return None
+        struc = Structure(value, name, 0)
+        candidates = self.groups.get((name, 1 - struc.gender()))
+        if not candidates:
+            return None
+        for other in candidates:
+            other = Structure(other, name, 0)
+            if other.sysid() == struc.sysid() and other.is_parent() == struc.is_parent():
+                return other.value
+        return candidates[0]
+
+    def missing(self, sysid: int | None = None) -> list[int]:
+        """
+        Values without a model of the same name and the other gender, ascending.
+        """
+        result = []
+        for (name, gender), values in self.groups.items():
+            if (name, 1 - gender) in self.groups:
+                continue
+            result.extend(x for x in values if sysid is None or Structure(x, name, 0).sysid() == sysid)
+        result.sort()
+        return result
@@ -0,0 +1,239 @@
+import json
+import sqlite3
+from factory import schema
+
+
+# Where a search hit came from, also the order of results
+SOURCE_NAME = 0
+SOURCE_INFO = 1
+SOURCE_SENTENCE = 2
+
+# The trigram tokenizer can only match keywords of at least three characters,
+# shorter ones are looked up in the gram tables, which index every character and character pair
+MIN_MATCH_LENGTH = 3
+# SQL function filling the gram tables, see grams
+GRAMS_FUNCTION = "fts_grams"
+
+SCHEMA = (
+    "CREATE VIRTUAL TABLE info_fts USING fts5("
+    "name, info, content='info', content_rowid='value', tokenize='trigram')",
+    "CREATE TRIGGER info_fts_ai AFTER INSERT ON info BEGIN "
+    "INSERT INTO info_fts (rowid,name,info) VALUES (new.value,new.name,new.info); END",
+    "CREATE TRIGGER info_fts_ad AFTER DELETE ON info BEGIN "
+    "INSERT INTO info_fts (info_fts,rowid,name,info) VALUES ('delete',old.value,old.name,old.info); END",
+    "CREATE TRIGGER info_fts_au AFTER UPDATE ON info BEGIN "
+    "INSERT INTO info_fts (info_fts,rowid,name,info) VALUES ('delete',old.value,old.name,old.info); "
+    "INSERT INTO info_fts (rowid,name,info) VALUES (new.value,new.name,new.info); END",
+    "CREATE VIRTUAL TABLE attribution_fts USING fts5("
+    "context, content='attribution', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER attribution_fts_ai AFTER INSERT ON attribution BEGIN "
+    "INSERT INTO attribution_fts (rowid,context) VALUES (new.id,new.context); END",
+    "CREATE TRIGGER attribution_fts_ad AFTER DELETE ON attribution BEGIN "
+    "INSERT INTO attribution_fts (attribution_fts,rowid,context) VALUES ('delete',old.id,old.context); END",
+    "CREATE TRIGGER attribution_fts_au AFTER UPDATE ON attribution BEGIN "
+    "INSERT INTO attribution_fts (attribution_fts,rowid,context) VALUES ('delete',old.id,old.context); "
+    "INSERT INTO attribution_fts (rowid,context) VALUES (new.id,new.context); END",
+    # Contentless, a row is deleted with the grams it was indexed with
+    "CREATE VIRTUAL TABLE info_grams USING fts5(name, info, content='', tokenize='unicode61')",
+    "CREATE TRIGGER info_grams_ai AFTER INSERT ON info BEGIN "
+    "INSERT INTO info_grams (rowid,name,info) VALUES (new.value,fts_grams(new.name),fts_grams(new.info)); END",
+    "CREATE TRIGGER info_grams_ad AFTER DELETE ON info BEGIN "
+    "INSERT INTO info_grams (info_grams,rowid,name,info) "
+    "VALUES ('delete',old.value,fts_grams(old.name),fts_grams(old.info)); END",
+    "CREATE TRIGGER info_grams_au AFTER UPDATE ON info BEGIN "
+    "INSERT INTO info_grams (info_grams,rowid,name,info) "
+    "VALUES ('delete',old.value,fts_grams(old.name),fts_grams(old.info)); "
+    "INSERT INTO info_grams (rowid,name,info) VALUES (new.value,fts_grams(new.name),fts_grams(new.info)); END",
+    "CREATE VIRTUAL TABLE attribution_grams USING fts5(context, content='', tokenize='unicode61')",
+    "CREATE TRIGGER attribution_grams_ai AFTER INSERT ON attribution BEGIN "
+    "INSERT INTO attribution_grams (rowid,context) VALUES (new.id,fts_grams(new.context)); END",
+    "CREATE TRIGGER attribution_grams_ad AFTER DELETE ON attribution BEGIN "
+    "INSERT INTO attribution_grams (attribution_grams,rowid,context) "
+    "VALUES ('delete',old.id,fts_grams(old.context)); END",
+    "CREATE TRIGGER attribution_grams_au AFTER UPDATE ON attribution BEGIN "
+    "INSERT INTO attribution_grams (attribution_grams,rowid,context) "
+    "VALUES ('delete',old.id,fts_grams(old.context)); "
+    "INSERT INTO attribution_grams (rowid,context) VALUES (new.id,fts_grams(new.context)); END",
+)
+
+TABLES = ("info_fts", "attribution_fts", "info_grams", "attribution_grams")
+
+
+def grams(text: str | None) -> str:
+    """
+    Every character and every pair of adjacent characters of text, separated by spaces.
+    Most Chinese keywords are one or two characters, too short for trigrams.
+    """
+    if not text:
+        return ""
+    tokens = []
+    for i, char in enumerate(text):
+        if not char.isalnum():
+            continue
+        tokens.append(char)
+        if i + 1 < len(text) and text[i + 1].isalnum():
+            tokens.append(text[i:i + 2])
+    return " ".join(tokens)
+
+
+def register(db: sqlite3.Connection):
+    """
+    Make the function of the gram triggers known to a connection, every connection writing info or attribution needs it.
+    """
+    db.create_function(GRAMS_FUNCTION, 1, grams, deterministic=True)
+
+
+def installed(db: sqlite3.Connection) -> bool:
+    """
+    Whether every full-text table exists, the sentence index being keyed on attribution.id.
+    """
+    cur = db.cursor()
+    cur.execute(f"SELECT name,sql FROM sqlite_master WHERE name IN ({','.join('?' * len(TABLES))})", TABLES)
+    tables = dict(cur.fetchall())
+    return len(tables) == len(TABLES) and "content_rowid='id'" in tables["attribution_fts"]
+
+
+def ensure(db: sqlite3.Connection):
+    """
+    Create the full-text tables and their triggers if the database has none yet, or older ones.
+    """
+    if not installed(db):
+        rebuild(db)
+
+
+def rebuild(db: sqlite3.Connection):
+    """
+    Drop and recreate the full-text tables, then index all existing rows, all or nothing.
+    """
+    register(db)
+    # The sentence index is keyed on attribution.id
+    schema.ensure_attribution_key(db)
+
+    def _rebuild():
+        for name in TABLES:
+            db.execute(f"DROP TABLE IF EXISTS {name}")
+            for action in ("ai", "ad", "au"):
+                db.execute(f"DROP TRIGGER IF EXISTS {name}_{action}")
+        for sql in SCHEMA:
+            db.execute(sql)
+        db.execute("INSERT INTO info_fts (info_fts) VALUES ('rebuild')")
+        db.execute("INSERT INTO attribution_fts (attribution_fts) VALUES ('rebuild')")
+        db.execute("INSERT INTO info_grams (rowid,name,info) SELECT value,fts_grams(name),fts_grams(info) FROM info")
+        db.execute("INSERT INTO attribution_grams (rowid,context) SELECT id,fts_grams(context) FROM attribution")
+
+    schema.transaction(db, _rebuild)
+
+
+def _short(keywords: str) -> bool:
+    """
+    Whether the keywords are one gram of the gram tables.
+    """
+    return len(keywords) < MIN_MATCH_LENGTH and all(x.isalnum() for x in keywords)
+
+
+def _tables(keywords: str) -> tuple[str, str] | None:
+    """
+    The full-text tables of info and attribution matching the keywords, None if none can.
+    """
+    if len(keywords) >= MIN_MATCH_LENGTH:
+        return "info_fts", "attribution_fts"
+    if _short(keywords):
+        return "info_grams", "attribution_grams"
+    return None
+
+
+def _phrase(keywords: str) -> str:
+    return '"{}"'.format(keywords.replace('"', '""'))
+
+
+def sentence_hits(keywords: str, schema: str = "main") -> tuple[str, tuple]:
+    """
+    Sub query of (text_hash, score) for every sentence of a schema containing the keywords.
+    """
+    tables = _tables(keywords)
+    if tables is None:
+        # Punctuation is in no index, scan the sentences instead
+        return f"SELECT text_hash,0 AS score FROM {schema}.attribution WHERE context LIKE ?", (f"%{keywords}%",)
+    sentences = tables[1]
+    sql = (
+        "SELECT a.text_hash,f.score FROM ("
+        f"SELECT rowid,bm25({sentences}) AS score FROM {schema}.{sentences} WHERE {sentences} MATCH ?"
+        f") AS f JOIN {schema}.attribution AS a ON a.id=f.rowid"
+    )
+    return sql, (_phrase(keywords),)
+
+
+def _branches(keywords: str, shared_hits: list | None = None) -> list[tuple[int, str, tuple]]:
+    """
+    (source, sub query of (value, score), params) for every field, a lower score is more relevant.
+    shared_hits: (text_hash, score) of sentences stored in other catalogs, see factory.catalogs.
+    """
+    sql, params = sentence_hits(keywords)
+    sentences = (
+        "SELECT c.model_value AS value,h.score FROM "
+        f"({sql}) AS h JOIN ia_connect AS c ON c.text_hash=h.text_hash"
+    )
+    if shared_hits:
+        # Sentences linked here whose text is stored elsewhere
+        sentences += (
+            " UNION ALL SELECT c.model_value,json_extract(j.value,'$[1]') FROM json_each(?) AS j "
+            "JOIN ia_connect AS c ON c.text_hash=json_extract(j.value,'$[0]')"
+        )
+        params = (*params, json.dumps(shared_hits))
+    tables = _tables(keywords)
+    if tables is None:
+        pattern = f"%{keywords}%"
+        return [
+            (SOURCE_NAME, "SELECT value,0 AS score FROM info WHERE name LIKE ?", (pattern,)),
+            (SOURCE_INFO, "SELECT value,0 AS score FROM info WHERE info LIKE ?", (pattern,)),
+            (SOURCE_SENTENCE, sentences, params),
+        ]
+    info = tables[0]
+    match = f"SELECT rowid AS value,bm25({info}) AS score FROM {info} WHERE {info} MATCH ?"
+    phrase = _phrase(keywords)
+    return [
+        (SOURCE_NAME, match, (f"name:{phrase}",)),
+        (SOURCE_INFO, match, (f"info:{phrase}",)),
+        (SOURCE_SENTENCE, sentences, params),
+    ]
+
+
+def search(
+        db: sqlite3.Connection, keywords: str, conditions: list[str], params: list, after: tuple | None, limit: int,
+        shared_hits: list | None = None
+):
+    """
+    A page of (value, name, source, rank) of models whose name, old info or sentences contain the keywords.
+    Every model appears once with its most relevant source, ordered by (source, rank, value),
+    rank being the bm25 score of its best match.
+    conditions, params: extra filters on the info table aliased as i.
+    after: the last hit of the previous page, None for the first page.
+    shared_hits: (text_hash, score) of matching sentences stored in other catalogs.
+    Fields before the one of after are not grouped nor sorted, only used to leave out the models already listed.
+    """
+    branches = _branches(keywords, shared_hits)
+    start = SOURCE_NAME if after is None else after[2]
+    # Every field is matched once, bm25 needs a query of its own
+    ctes = ",".join(f"s{source} AS MATERIALIZED ({sql})" for source, sql, _ in branches)
+    hit_params = [x for _, _, values in branches for x in values]
+    parts = []
+    for source, _, _ in branches:
+        if source < start:
+            continue
+        # A model found in a more relevant field was listed there
+        excluded = "".join(f" AND value NOT IN (SELECT value FROM s{x})" for x, _, _ in branches if x < source)
+        parts.append(
+            f"SELECT value,{source} AS source,MIN(score) AS score FROM s{source} WHERE 1{excluded} GROUP BY value"
+        )
+    if after is not None:
+        conditions = [*conditions, "(h.source,h.score,i.value)>(?,?,?)"]
+        params = [*params, after[2], after[3], after[0]]
+    where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+    cur = db.cursor()
+    cur.execute(
+        f"WITH {ctes} SELECT i.value,i.name,h.source,h.score FROM ({' UNION ALL '.join(parts)}) AS h "
+        f"JOIN info AS i ON i.value=h.value {where}"
+        "ORDER BY h.source,h.score,i.value LIMIT ?",
+        (*hit_params, *params, limit)
+    )
+    return cur.fetchall()
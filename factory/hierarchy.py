@@ -0,0 +1,118 @@
+import json
+import sqlite3
+from array import array
+from collections import deque
+
+
+# Every row of a walk remembers the values it passed, a value met twice ends the walk instead of looping
+_ANCESTORS = (
+    "WITH RECURSIVE chain (origin,value,name,pval,depth,path) AS ("
+    "SELECT i.value,i.value,i.name,i.pval,0,','||i.value||',' FROM json_each(?) AS j "
+    "JOIN info AS i ON i.value=j.value "
+    "UNION ALL SELECT chain.origin,i.value,i.name,i.pval,chain.depth+1,chain.path||i.value||',' FROM chain "
+    "JOIN info AS i ON i.value=chain.pval WHERE chain.pval!=0 AND instr(chain.path,','||i.value||',')=0"
+    ") SELECT origin,value,name,pval FROM chain ORDER BY origin,depth DESC"
+)
+
+_DESCENDANTS = (
+    "WITH RECURSIVE tree (value,name,pval,depth,path) AS ("
+    "SELECT value,name,pval,0,','||value||',' FROM info WHERE value=? "
+    "UNION ALL SELECT i.value,i.name,i.pval,tree.depth+1,tree.path||i.value||',' FROM tree "
+    "JOIN info AS i ON i.pval=tree.value WHERE instr(tree.path,','||i.value||',')=0"
+    ") SELECT value,name,pval,depth FROM tree WHERE depth>0 ORDER BY depth,value"
+)
+
+
+def ancestors_many(db: sqlite3.Connection, values) -> dict[int, list[tuple]]:
+    """
+    Chains of (value, name, pval) from the top ancestor down to each value, in one query.
+    """
+    cur = db.cursor()
+    cur.execute(_ANCESTORS, (json.dumps(list(values)),))
+    chains = {}
+    for origin, *row in cur.fetchall():
+        chains.setdefault(origin, []).append(tuple(row))
+    return chains
+
+
+def ancestors(db: sqlite3.Connection, value: int) -> list[tuple]:
+    return ancestors_many(db, (value,)).get(value, [])
+
+
+def descendants(db: sqlite3.Connection, value: int) -> list[tuple]:
+    """
+    (value, name, pval, depth) of the whole subtree below value, nearest first.
+    """
+    cur = db.cursor()
+    cur.execute(_DESCENDANTS, (value,))
+    return cur.fetchall()
+
+
+class HierarchyIndex:
+    """
+    Parent and children of every structure in memory, loaded once.
+    """
+    def __init__(self, db: sqlite3.Connection):
+        cur = db.cursor()
+        cur.execute("SELECT value,pval FROM info ORDER BY value")
+        self.parent: dict[int, int] = {}
+        self.children: dict[int, array] = {}
+        for value, pval in cur.fetchall():
+            self.add(value, pval)
+
+    def add(self, value: int, pval: int):
+        self.parent[value] = pval
+        self.children.setdefault(pval, array('q')).append(value)
+
+    def ancestors(self, value: int) -> list[int]:
+        """
+        Values from the top ancestor down to value.
+        """
+        chain = [value]
+        seen = {value}
+        while (pval := self.parent.get(chain[-1], 0)) != 0 and pval in self.parent and pval not in seen:
+            chain.append(pval)
+            seen.add(pval)
+        chain.reverse()
+        return chain
+
+    def descendants(self, value: int) -> list[int]:
+        """
+        Values of the whole subtree below value, nearest first.
+        """
+        result = []
+        seen = {value}
+        queue = deque((value,))
+        while queue:
+            for child in self.children.get(queue.popleft(), ()):
+                if child not in seen:
+                    seen.add(child)
+                    result.append(child)
+                    queue.append(child)
+        return result
+
+    def depth(self, value: int) -> int:
+        return len(self.ancestors(value)) - 1
+
+    def subtree_size(self, value: int) -> int:
+        return len(self.descendants(value))
+
+    def cycles(self) -> list[list[int]]:
+        """
+        Every group of structures whose parents point at each other in a loop.
+        """
+        result = []
+        # 0 unvisited, 1 on the current walk, 2 finished
+        state = dict.fromkeys(self.parent, 0)
+        for start in self.parent:
+            walk = []
+            node = start
+            while node in state and state[node] == 0:
+                state[node] = 1
+                walk.append(node)
+                node = self.parent[node]
+            if node in state and state[node] == 1:
+                result.append(walk[walk.index(node):])
+            for node in walk:
+                state[node] = 2
+        return result
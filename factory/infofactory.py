@@ -1,10 +1,19 @@
-import sqlite3
+import json
 from model.structure import Structure
+from factory.navigation import structures_inserted
+from factory import allocator, connection, hierarchy, migration
+from configuration import DATABASE_PATH
 
 
 class InfoFactory:
-    def __init__(self):
-        self.db = sqlite3.connect("../resource/creature.db")
+    def __init__(self, path: str = DATABASE_PATH):
+        self.path = path
+        self.connections = connection.manager(path)
+        self.db = self.connections.writer()
+        migration.migrate(self.db)
+        self._hierarchy = None
+        # value已分配但尚未插入
+        self.reserved: set[int] = set()
 
     def get_structures_by_name(self, key_name: str):
         """
@@ -29,57 +38,107 @@ class InfoFactory:
         """
         插入一个新结构
         """
-        if not struc.value_compliance() or not struc.name_compliance() or struc.pval == 0:
-            raise ValueError("插入的数据不完整")
-        cur = self.db.cursor()
-        cur.execute("SELECT COUNT(*) FROM info WHERE value={}".format(struc.value))
-        if cur.fetchone()[0] > 0:
+        self.create_structures((struc,))
+
+    def create_structures(self, strucs):
+        """
+        在一个事务中插入多个新结构，任一不合规则全部不插入
+        """
+        strucs = list(strucs)
+        for struc in strucs:
+            if not struc.value_compliance() or not struc.name_compliance() or struc.pval == 0:
+                raise ValueError("插入的数据不完整")
+        values = [struc.value for struc in strucs]
+        if len(set(values)) != len(values):
             raise ValueError("插入的数据重复")
+        cur = self.db.cursor()
         cur.execute(
-            "INSERT INTO info (value,name,pval,sysid,sex,is_parent) VALUES (?,?,?,?,?,?)",
-            (struc.value, struc.name, struc.pval, struc.sysid(), struc.gender(), struc.is_parent())
+            "SELECT COUNT(*) FROM json_each(?) AS j JOIN info AS i ON i.value=j.value", (json.dumps(values),)
         )
-        self.db.commit()
+        if cur.fetchone()[0] > 0:
+            raise ValueError("插入的数据重复")
+        with self.db:
+            cur.executemany(
+                "INSERT INTO info (value,name,pval,sysid,sex,is_parent) VALUES (?,?,?,?,?,?)",
+                ((x.value, x.name, x.pval, x.sysid(), x.gender(), x.is_parent()) for x in strucs)
+            )
+        self.reserved.difference_update(values)
+        structures_inserted(self.path, strucs)
+        if self._hierarchy is not None:
+            for struc in strucs:
+                self._hierarchy.add(struc.value, struc.pval)
 
     def generate_new_sturcture(self, sysid: int, is_parent: int, sex: int):
         """
-        返回一个可用value
+        返回一个可用value，该value被保留直到插入
         """
-        cur = self.db.cursor()
-        cur.execute(
-            "SELECT value FROM info WHERE sysid=? AND is_parent=? AND sex=? ORDER BY value",
-            (sysid, is_parent, sex)
-        )
-        if is_parent:
-            startnum = (sysid + 10) * 10000 + sex * 1000 + 1
-        else:
-            startnum = (sysid + 10) * 100000 + sex * 10000
-        for val, in cur.fetchall():
-            if startnum == val:
-                startnum += 1
-            else:
-                break
-        return Structure(startnum, "", 0)
+        return self.generate_new_structures(sysid, is_parent, sex, 1)[0]
+
+    def generate_new_structures(self, sysid: int, is_parent: int, sex: int, count: int, consecutive: bool = False):
+        """
+        返回count个可用value（最小的空缺优先），这些value被保留直到插入或释放
+        consecutive: value是否必须连续
+        """
+        values = allocator.allocate(self.db, sysid, is_parent, sex, count, self.reserved, consecutive)
+        self.reserved.update(values)
+        return [Structure(value, "", 0) for value in values]
+
+    def release_structures(self, strucs):
+        """
+        释放未插入的保留value
+        """
+        self.reserved.difference_update(struc.value for struc in strucs)
 
     def patrilineal_link(self, struc: Structure):
         """
         返回 父级关系链
         """
-        cur = self.db.cursor()
-        link = [struc]
-
-        def recursion(_pval):
-            cur.execute("SELECT value, name, pval FROM info WHERE value=?", (_pval,))
-            res = cur.fetchone()
-            if res is not None:
-                _struc = Structure(*res)
-                link.append(_struc)
-                if _struc.pval != 0:
-                    recursion(_struc.pval)
-
-        recursion(struc.pval)
-        link.reverse()
+        link = [Structure(*row) for row in hierarchy.ancestors(self.db, struc.pval)]
+        link.append(struc)
         return link
 
+    def patrilineal_links(self, values) -> dict[int, list[Structure]]:
+        """
+        一次查询返回多个value各自的父级关系链（包含自身）
+        """
+        return {
+            value: [Structure(*row) for row in chain]
+            for value, chain in hierarchy.ancestors_many(self.db, values).items()
+        }
+
+    def get_descendants(self, key_value: int):
+        """
+        一次查询返回所有子孙structure对象，由近及远
+        """
+        for value, name, pval, _ in hierarchy.descendants(self.db, key_value):
+            yield Structure(value, name, pval)
+
+    @property
+    def hierarchy(self) -> hierarchy.HierarchyIndex:
+        """
+        内存中的父子关系索引，首次使用时加载
+        """
+        if self._hierarchy is None:
+            self._hierarchy = hierarchy.HierarchyIndex(self.db)
+        return self._hierarchy
+
+    def depth(self, key_value: int) -> int:
+        """
+        返回层级深度，顶层为0
+        """
+        return self.hierarchy.depth(key_value)
+
+    def subtree_size(self, key_value: int) -> int:
+        """
+        返回所有子孙的数量
+        """
+        return self.hierarchy.subtree_size(key_value)
+
+    def find_cycles(self) -> list[list[int]]:
+        """
+        返回父级关系中形成循环的value
+        """
+        return self.hierarchy.cycles()
+
     def close(self):
-        self.db.close()
+        self.connections.release()
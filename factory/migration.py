@@ -0,0 +1,75 @@
+import re
+import sqlite3
+from factory import completion, fulltext, revision, schema
+
+
+# Steps bringing a database from version n to n+1 are MIGRATIONS[n], the version is PRAGMA user_version.
+# Every step must also succeed on a database which already has its result.
+MIGRATIONS = (
+    schema.ensure_unique_indexes,
+    schema.ensure_indexes,
+    fulltext.ensure,
+    completion.ensure,
+    revision.ensure,
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def version(db: sqlite3.Connection) -> int:
+    cur = db.cursor()
+    cur.execute("PRAGMA user_version")
+    return cur.fetchone()[0]
+
+
+def migrate(db: sqlite3.Connection) -> int:
+    """
+    Apply the missing steps in order, return the number applied.
+    """
+    current = version(db)
+    if current > SCHEMA_VERSION:
+        raise ValueError(f"Database version {current} is newer than this editor ({SCHEMA_VERSION})")
+    for target in range(current + 1, SCHEMA_VERSION + 1):
+        MIGRATIONS[target - 1](db)
+        with db:
+            db.execute(f"PRAGMA user_version={target}")
+    return SCHEMA_VERSION - current
+
+
+# Statements which read a whole table on purpose
+FULL_SCANS = (
+    "SELECT value,sysid FROM info ORDER BY",
+    "SELECT value,pval FROM info ORDER BY",
+    "SELECT value,name FROM info ORDER BY",
+    "SELECT value,pval,name FROM info ORDER BY",
+    "SELECT model_value,COUNT(*) FROM ia_connect GROUP BY",
+    "SELECT value,revision FROM model_revision ORDER BY",
+    "SELECT sysid,sex,completed,total FROM progress_stats",
+)
+
+
+def query_plan_problems(db: sqlite3.Connection, statements) -> list[tuple[str, str]]:
+    """
+    (statement, plan step) of every full table scan in the plans of the given statements.
+    Virtual tables, CTEs, subqueries and walks along an index are not counted.
+    """
+    problems = []
+    cur = db.cursor()
+    for sql in dict.fromkeys(statements):
+        if not sql.lstrip().upper().startswith(("SELECT", "WITH")) or sql.startswith(FULL_SCANS):
+            continue
+        if "'main'." in sql:
+            # Issued by FTS5 itself on its shadow tables
+            continue
+        cur.execute(f"EXPLAIN QUERY PLAN {sql}")
+        details = [row[3] for row in cur.fetchall()]
+        temporary = {x.split()[1] for x in details if x.startswith(("MATERIALIZE", "CO-ROUTINE"))}
+        temporary.update(re.findall(r"\bWITH (?:RECURSIVE )?(\w+)", sql))
+        for detail in details:
+            words = detail.split()
+            if (
+                    words[0] == "SCAN" and words[1] not in temporary and words[1] != "CONSTANT"
+                    and "VIRTUAL TABLE" not in detail and "INDEX" not in detail
+            ):
+                problems.append((sql, detail))
+    return problems
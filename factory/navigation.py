@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import weakref
+from array import array
+from bisect import bisect_left, insort
+
+
+# Every live in-memory index, patched when a structure is inserted through InfoFactory
+_indexes = weakref.WeakSet()
+
+
+def register(index):
+    """
+    Keep index current, it needs a path and an add_structures(strucs) method.
+    """
+    _indexes.add(index)
+
+
+def structures_inserted(path: str, strucs):
+    """
+    Patch the indexes opened on the database at path with new structures.
+    """
+    path = os.path.abspath(path)
+    for index in list(_indexes):
+        if index.path == path:
+            index.add_structures(strucs)
+
+
+class NavigationIndex:
+    """
+    Model values in browsing order (sysid, value), built once per session.
+    order/sysids: parallel arrays of the browsing order;
+    position: value -> index in order;
+    values: all values sorted, for the nearest value lookup.
+    """
+    def __init__(self, db: sqlite3.Connection, path: str):
+        self.path = os.path.abspath(path)
+        cur = db.cursor()
+        cur.execute("SELECT value,sysid FROM info ORDER BY sysid,value")
+        rows = cur.fetchall()
+        self.order = array('q', (x[0] for x in rows))
+        self.sysids = array('q', (x[1] for x in rows))
+        self.position = {value: idx for idx, value in enumerate(self.order)}
+        self.values = array('q', sorted(self.order))
+        register(self)
+
+    def __len__(self):
+        return len(self.order)
+
+    def __contains__(self, value):
+        return value in self.position
+
+    def step(self, value: int, direction: int) -> int:
+        """
+        The value next to a known value in browsing order, wrapping around at both ends.
+        """
+        idx = (self.position[value] + direction) % len(self.order)
+        return self.order[idx]
+
+    def neighbours(self, value: int, count: int) -> list[int]:
+        """
+        Up to count values on each side of a known value, nearest first, next before previous.
+        """
+        idx = self.position[value]
+        size = len(self.order)
+        result = []
+        for step in range(1, min(count, size // 2) + 1):
+            result.append(self.order[(idx + step) % size])
+            result.append(self.order[(idx - step) % size])
+        return result
+
+    def nearest(self, value: int) -> int:
+        """
+        The value closest to the given one, the larger wins if the distance is the same.
+        """
+        if not len(self.values):
+            raise ValueError("No model in database")
+        idx = bisect_left(self.values, value)
+        if idx == 0:
+            return self.values[0]
+        if idx == len(self.values):
+            return self.values[-1]
+        lower, upper = self.values[idx - 1], self.values[idx]
+        return lower if value - lower < upper - value else upper
+
+    def add_structures(self, strucs):
+        items = [(x.value, x.sysid()) for x in strucs]
+        if len(items) == 1:
+            self.insert(*items[0])
+        else:
+            self.insert_many(items)
+
+    def insert(self, value: int, sysid: int):
+        """
+        Add a new value without rebuilding, positions behind it are shifted.
+        """
+        if value in self.position:
+            return
+        # Locate the slot inside the block of the same system
+        lo, hi = 0, len(self.order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if (self.sysids[mid], self.order[mid]) < (sysid, value):
+                lo = mid + 1
+            else:
+                hi = mid
+        self.order.insert(lo, value)
+        self.sysids.insert(lo, sysid)
+        for idx in range(lo, len(self.order)):
+            self.position[self.order[idx]] = idx
+        insort(self.values, value)
+
+    def insert_many(self, items: list[tuple[int, int]]):
+        """
+        Add many (value, sysid) with one merge, positions are listed again once.
+        """
+        items = [x for x in items if x[0] not in self.position]
+        rows = sorted([*zip(self.sysids, self.order), *((sysid, value) for value, sysid in items)])
+        self.order = array('q', (x[1] for x in rows))
+        self.sysids = array('q', (x[0] for x in rows))
+        self.position = {value: idx for idx, value in enumerate(self.order)}
+        self.values = array('q', sorted(self.order))
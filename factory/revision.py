@@ -0,0 +1,120 @@
+import json
+import random
+import sqlite3
+import time
+from typing import NamedTuple
+from factory.connection import BUSY_TIMEOUT
+
+
+# Revision of every saved model, models never saved have revision 0
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS model_revision ("
+    "value INTEGER PRIMARY KEY, revision INTEGER NOT NULL DEFAULT 0)",
+    # Revision of the structures, raised whenever one is created, deleted, renamed or moved
+    "CREATE TABLE IF NOT EXISTS structure_revision ("
+    "id INTEGER PRIMARY KEY CHECK (id=0), revision INTEGER NOT NULL DEFAULT 0)",
+    "INSERT OR IGNORE INTO structure_revision (id,revision) VALUES (0,0)",
+    "CREATE TRIGGER IF NOT EXISTS structure_revision_ai AFTER INSERT ON info BEGIN "
+    "UPDATE structure_revision SET revision=revision+1 WHERE id=0; END",
+    "CREATE TRIGGER IF NOT EXISTS structure_revision_ad AFTER DELETE ON info BEGIN "
+    "UPDATE structure_revision SET revision=revision+1 WHERE id=0; END",
+    "CREATE TRIGGER IF NOT EXISTS structure_revision_au AFTER UPDATE OF value,name,pval ON info BEGIN "
+    "UPDATE structure_revision SET revision=revision+1 WHERE id=0; END",
+)
+# Attempts to start a write transaction while another editor holds the lock
+RETRIES = 8
+# Seconds before the first retry, doubled at each attempt
+RETRY_DELAY = 0.02
+# Seconds a write waits on a lock before a retry
+WRITE_TIMEOUT_MS = 250
+
+
+class Conflict(NamedTuple):
+    value: int
+    # Revision in the database, the edited model was loaded at an older one
+    revision: int
+    # Texts only in the database, saved meanwhile by someone else
+    theirs: tuple[str, ...]
+    # Texts only in the edited model
+    ours: tuple[str, ...]
+
+
+class RevisionConflict(Exception):
+    """
+    Models changed by someone else since they were loaded, nothing has been saved.
+    """
+    def __init__(self, conflicts: list[Conflict]):
+        super().__init__(f"{len(conflicts)} 个模型已被他人修改：" + "，".join(str(x.value) for x in conflicts))
+        self.conflicts = conflicts
+
+
+# Number of write transactions retried because the database was locked, for measurements
+retried = 0
+
+
+def ensure(db: sqlite3.Connection):
+    with db:
+        for sql in SCHEMA:
+            db.execute(sql)
+
+
+def structure_revision(db: sqlite3.Connection) -> int:
+    cur = db.cursor()
+    cur.execute("SELECT revision FROM structure_revision WHERE id=0")
+    return cur.fetchone()[0]
+
+
+def revisions(db: sqlite3.Connection, values) -> dict[int, int]:
+    """
+    Current revision of every value.
+    """
+    values = list(values)
+    cur = db.cursor()
+    cur.execute(
+        "SELECT r.value,r.revision FROM json_each(?) AS j JOIN model_revision AS r ON r.value=j.value",
+        (json.dumps(values),)
+    )
+    result = dict.fromkeys(values, 0)
+    result.update(cur.fetchall())
+    return result
+
+
+def bump(db: sqlite3.Connection, values):
+    db.executemany(
+        "INSERT INTO model_revision (value,revision) VALUES (?,1) "
+        "ON CONFLICT (value) DO UPDATE SET revision=revision+1",
+        ((value,) for value in values)
+    )
+
+
+def _busy(error: sqlite3.OperationalError) -> bool:
+    message = str(error)
+    return "locked" in message or "busy" in message
+
+
+def immediate(db: sqlite3.Connection, func, attempts: int = RETRIES, delay: float = RETRY_DELAY):
+    """
+    Run func in a write transaction taken before any read, so what it reads cannot change before it writes.
+    A locked database is retried with a growing random delay instead of waiting the whole busy timeout.
+    """
+    global retried
+    db.execute(f"PRAGMA busy_timeout={WRITE_TIMEOUT_MS}")
+    try:
+        for attempt in range(attempts):
+            try:
+                db.execute("BEGIN IMMEDIATE")
+                break
+            except sqlite3.OperationalError as e:
+                if not _busy(e) or attempt == attempts - 1:
+                    raise
+                retried += 1
+                time.sleep(delay * (2 ** attempt) * (0.5 + random.random()))
+        try:
+            result = func()
+        except BaseException:
+            db.rollback()
+            raise
+        db.commit()
+        return result
+    finally:
+        db.execute(f"PRAGMA busy_timeout={int(BUSY_TIMEOUT * 1000)}")
@@ -0,0 +1,122 @@
+import sqlite3
+
+
+# name: (table, columns which identify a row)
+UNIQUE_INDEXES = {
+    "attribution_text_hash": ("attribution", "text_hash"),
+    "ia_connect_model_text": ("ia_connect", "model_value,text_hash"),
+}
+
+
+def duplicates(db: sqlite3.Connection, table: str, columns: str) -> list[tuple]:
+    """
+    (rowid, *row) of every row identified by the same columns as an earlier row, in rowid order.
+    """
+    cur = db.cursor()
+    cur.execute(
+        f"SELECT rowid,* FROM {table} WHERE rowid NOT IN (SELECT MIN(rowid) FROM {table} GROUP BY {columns}) "
+        "ORDER BY rowid"
+    )
+    return cur.fetchall()
+
+
+def ensure_unique_indexes(db: sqlite3.Connection):
+    """
+    Create the unique indexes that INSERT OR IGNORE relies on.
+    A database holding duplicated rows left by older versions is not changed, they must be
+    reviewed and removed first, see remove_duplicates.
+    """
+    cur = db.cursor()
+    cur.execute("SELECT name FROM sqlite_master WHERE type='index'")
+    exists = {x[0] for x in cur.fetchall()}
+    missing = [name for name in UNIQUE_INDEXES if name not in exists]
+    if not missing:
+        return
+    found = {}
+    for name in missing:
+        table, columns = UNIQUE_INDEXES[name]
+        rows = duplicates(db, table, columns)
+        if rows:
+            found[table] = len(rows)
+    if found:
+        raise ValueError(
+            "Duplicated rows prevent the unique indexes ("
+            + ", ".join(f"{table}: {count}" for table, count in found.items())
+            + "), review and remove them with python -m pyscript.dedupe"
+        )
+    with db:
+        for name in missing:
+            table, columns = UNIQUE_INDEXES[name]
+            db.execute(f"CREATE UNIQUE INDEX {name} ON {table} ({columns})")
+
+
+def remove_duplicates(db: sqlite3.Connection) -> dict[str, list[tuple]]:
+    """
+    Delete the rows which keep the unique indexes from being created, the earliest row is kept.
+    Returns the deleted rows of every table, see duplicates.
+    """
+    removed = {}
+    with db:
+        for table, columns in UNIQUE_INDEXES.values():
+            rows = duplicates(db, table, columns)
+            db.executemany(f"DELETE FROM {table} WHERE rowid=?", ((x[0],) for x in rows))
+            removed[table] = rows
+    return removed
+
+
+def transaction(db: sqlite3.Connection, func):
+    """
+    Run func in one explicit write transaction, rolled back if it fails.
+    Unlike with db:, which leaves DDL to autocommit, schema changes are included.
+    """
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        func()
+    except BaseException:
+        db.rollback()
+        raise
+    db.commit()
+
+
+def ensure_attribution_key(db: sqlite3.Connection):
+    """
+    Give every sentence an explicit INTEGER PRIMARY KEY, the full-text index refers to it
+    and VACUUM may renumber the implicit rowid of a table without one.
+    """
+    cur = db.cursor()
+    cur.execute("PRAGMA table_info(attribution)")
+    if "id" in (x[1] for x in cur.fetchall()):
+        return
+
+    def _rebuild():
+        db.execute("CREATE TABLE attribution_keyed (id INTEGER PRIMARY KEY, context TEXT, text_hash TEXT)")
+        db.execute(
+            "INSERT INTO attribution_keyed (id,context,text_hash) SELECT rowid,context,text_hash FROM attribution"
+        )
+        db.execute("DROP TABLE attribution")
+        db.execute("ALTER TABLE attribution_keyed RENAME TO attribution")
+        for name, (table, columns) in UNIQUE_INDEXES.items():
+            if table == "attribution":
+                db.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+    transaction(db, _rebuild)
+
+
+# name: (table, columns) of indexes behind the hot queries of the factories
+INDEXES = {
+    "info_sysid_value": ("info", "sysid,value"),
+    "info_sysid_sex": ("info", "sysid,sex"),
+    "info_pval": ("info", "pval"),
+    "ia_connect_model_order": ("ia_connect", "model_value,order_id"),
+    "ia_connect_text_hash": ("ia_connect", "text_hash"),
+    "info_old_info_value": ("info_old_info", "value"),
+}
+
+
+def ensure_indexes(db: sqlite3.Connection):
+    """
+    Create the indexes the factory queries are planned with.
+    """
+    with db:
+        for name, (table, columns) in INDEXES.items():
+            db.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
@@ -0,0 +1,184 @@
+import contextlib
+import functools
+import json
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+
+
+# Upper bounds in milliseconds of the latency histogram buckets, the last one is open
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+# Statements kept per action in the report, most frequent first
+TOP_STATEMENTS = 20
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(sql: str) -> str:
+    """
+    Statement text with literals replaced by ?, so executions of the same query are counted together.
+    """
+    return _SPACES.sub(" ", _LITERALS.sub("?", sql)).strip()
+
+
+class _Action:
+    __slots__ = ("calls", "total", "longest", "histogram", "queries", "sql_time", "statements")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.longest = 0.0
+        self.histogram = [0] * (len(BUCKETS) + 1)
+        self.queries = 0
+        self.sql_time = 0.0
+        # normalized statement -> [executions, seconds]
+        self.statements: dict[str, list] = {}
+
+    def report(self) -> dict:
+        top = sorted(self.statements.items(), key=lambda x: (-x[1][0], -x[1][1]))[:TOP_STATEMENTS]
+        return {
+            "calls": self.calls,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total * 1000 / self.calls if self.calls else 0,
+            "max_ms": self.longest * 1000,
+            "histogram": dict(zip([f"<{x}ms" for x in BUCKETS] + [f">={BUCKETS[-1]}ms"], self.histogram)),
+            "queries": self.queries,
+            "queries_per_call": self.queries / self.calls if self.calls else 0,
+            "sql_ms": self.sql_time * 1000,
+            "statements": [{"sql": sql, "count": count, "ms": seconds * 1000} for sql, (count, seconds) in top],
+        }
+
+
+class Recorder:
+    """
+    Latency of user actions and the statements they execute.
+    Disabled by default, then connections are left untouched and actions cost one attribute check.
+    The time of a statement is measured up to the next statement or the end of the action,
+    so it includes fetching the rows and the Python work in between.
+    Statements outside of actions are only counted.
+    """
+    # Statements run outside of any action, e.g. on background threads
+    IDLE = "(background)"
+
+    def __init__(self):
+        self.enabled = False
+        self._actions: dict[str, _Action] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enable(self):
+        """
+        Start recording, only connections opened afterwards are traced.
+        """
+        self.enabled = True
+
+    def attach(self, db: sqlite3.Connection):
+        if self.enabled:
+            db.set_trace_callback(self._statement)
+
+    def reset(self):
+        with self._lock:
+            self._actions.clear()
+
+    def _current(self) -> tuple[str | None, float]:
+        return getattr(self._local, "action", None), getattr(self._local, "started", 0.0)
+
+    def _close_statement(self, now: float):
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            return
+        self._local.pending = None
+        name, sql, start = pending
+        with self._lock:
+            action = self._actions.setdefault(name, _Action())
+            action.sql_time += now - start
+            entry = action.statements.setdefault(sql, [0, 0.0])
+            entry[0] += 1
+            entry[1] += now - start
+
+    def _statement(self, sql: str):
+        now = time.perf_counter()
+        self._close_statement(now)
+        name = getattr(self._local, "action", None)
+        with self._lock:
+            action = self._actions.setdefault(name or self.IDLE, _Action())
+            action.queries += 1
+            if name is None:
+                # Nothing ends a background statement, only executions are counted
+                action.statements.setdefault(normalize(sql), [0, 0.0])[0] += 1
+                return
+        self._local.pending = (name, normalize(sql), now)
+
+    def begin(self, name: str) -> bool:
+        """
+        Start an action on the calling thread, False if one is already running and absorbs this one.
+        """
+        if getattr(self._local, "action", None) is not None:
+            return False
+        self._local.action = name
+        self._local.started = time.perf_counter()
+        return True
+
+    def end(self):
+        now = time.perf_counter()
+        self._close_statement(now)
+        name, started = self._current()
+        self._local.action = None
+        elapsed = now - started
+        with self._lock:
+            action = self._actions.setdefault(name, _Action())
+            action.calls += 1
+            action.total += elapsed
+            action.longest = max(action.longest, elapsed)
+            action.histogram[bisect_left(BUCKETS, elapsed * 1000)] += 1
+
+    def report(self) -> dict:
+        with self._lock:
+            return {name: action.report() for name, action in sorted(self._actions.items())}
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="UTF-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=1)
+
+
+recorder = Recorder()
+
+
+@contextlib.contextmanager
+def measure(name: str):
+    """
+    Record a block as one action, for slots which also wait on a dialog or the user,
+    only the work around the dialog is timed.
+    """
+    if not recorder.enabled or not recorder.begin(name):
+        yield
+        return
+    try:
+        yield
+    finally:
+        recorder.end()
+
+
+def action(name: str | None = None):
+    """
+    Decorator recording every call of a function or Qt slot as one action.
+    Only the positional arguments the function declares are passed, signals may send more.
+    """
+    def _decorate(func):
+        label = name or func.__name__
+        argcount = func.__code__.co_argcount
+
+        @functools.wraps(func)
+        def _wrapper(*args):
+            args = args[:argcount]
+            if not recorder.enabled or not recorder.begin(label):
+                return func(*args)
+            try:
+                return func(*args)
+            finally:
+                recorder.end()
+        return _wrapper
+    return _decorate
@@ -0,0 +1,198 @@
+import os
+import gzip
+import itertools
+import json
+import lzma
+import time
+import codecs
+import sqlite3
+import tempfile
+from collections.abc import Callable, Generator
+
+
+CHUNK_SIZE = 1 << 16
+
+# format name: file suffix
+FORMATS = {
+    "json": ".json",
+    "ndjson": ".ndjson",
+    "ndjson.gz": ".ndjson.gz",
+    "ndjson.xz": ".ndjson.xz",
+}
+
+# suffix: open a binary stream over a raw file object
+_OPENERS = {
+    ".gz": lambda raw, mode: gzip.GzipFile(fileobj=raw, mode=mode),
+    ".xz": lambda raw, mode: lzma.LZMAFile(raw, mode=mode),
+}
+
+# Keys numbering the rows of one database only, neither exported nor imported
+LOCAL_KEYS = {"attribution": ("id",)}
+
+# table, rows read, bytes read, file size -> False to stop
+Progress = Callable[[str, int, int, int], bool]
+
+
+def _iter_array(f) -> Generator[tuple[dict, int]]:
+    """
+    Decode the items of a json array one by one, the array is never held in memory.
+    """
+    text = codecs.getincrementaldecoder("UTF-8")()
+    parser = json.JSONDecoder()
+    buf = ""
+    idx = 0
+    started = False
+    eof = False
+    while True:
+        # Skip separators
+        while idx < len(buf) and buf[idx] in "\ufeff \t\r\n,":
+            idx += 1
+        if started and idx < len(buf) and buf[idx] == "]":
+            return
+        if not started and idx < len(buf):
+            if buf[idx] != "[":
+                raise ValueError("Not a json array")
+            started = True
+            idx += 1
+            continue
+        try:
+            if idx >= len(buf):
+                raise ValueError
+            row, end = parser.raw_decode(buf, idx)
+        except ValueError:
+            # The item is incomplete, read more
+            if eof:
+                if started and buf[idx:].strip():
+                    raise
+                return
+            chunk = f.read(CHUNK_SIZE)
+            eof = not chunk
+            buf = buf[idx:] + text.decode(chunk, final=eof)
+            idx = 0
+            continue
+        idx = end
+        yield row, f.tell()
+
+
+def _iter_lines(f) -> Generator[tuple[dict, int]]:
+    for line in iter(f.readline, b""):
+        line = line.strip()
+        if line:
+            yield json.loads(line), f.tell()
+
+
+def iter_json_rows(f) -> Generator[tuple[dict, int]]:
+    """
+    Yield (row, bytes read) from a binary file holding a json array or NDJSON.
+    """
+    head = f.read(CHUNK_SIZE)
+    f.seek(0)
+    if head.lstrip().lstrip(codecs.BOM_UTF8).startswith(b"["):
+        yield from _iter_array(f)
+    else:
+        yield from _iter_lines(f)
+
+
+def find_table_file(folder: str, name: str) -> str | None:
+    """
+    The exported file of a table in any known format.
+    """
+    for suffix in FORMATS.values():
+        filename = os.path.join(folder, name + suffix)
+        if os.path.exists(filename):
+            return filename
+    return None
+
+
+def import_table(
+        db: sqlite3.Connection, name: str, filename: str, batch_size: int, progress: Progress | None = None
+) -> tuple[int, bool]:
+    """
+    Insert rows of a json file into a table, rows already present are ignored.
+    Every batch is committed on its own.
+    :return: (number of inserted rows, whether the file was read completely)
+    """
+    cur = db.cursor()
+    cur.execute(f"PRAGMA table_info({name})")
+    table_columns = [x[1] for x in cur.fetchall() if x[1] not in LOCAL_KEYS.get(name, ())]
+    total = os.path.getsize(filename)
+    columns = None
+    batch = []
+    count = 0
+    read = 0
+
+    def _flush():
+        nonlocal count
+        with db:
+            cur.executemany(
+                f"INSERT OR IGNORE INTO {name} ({','.join(columns)}) VALUES ({','.join('?' * len(columns))})", batch
+            )
+        # Ignored rows are not counted
+        count += cur.rowcount
+        batch.clear()
+
+    opener = _OPENERS.get(os.path.splitext(filename)[1])
+    with open(filename, "rb") as raw:
+        f = raw if opener is None else opener(raw, "rb")
+        for row, _ in iter_json_rows(f):
+            # Progress follows the file on disk, compressed or not
+            done = raw.tell()
+            if columns is None:
+                # Only known columns are inserted
+                columns = [x for x in table_columns if x in row]
+            batch.append(tuple(row.get(x) for x in columns))
+            read += 1
+            if len(batch) >= batch_size:
+                _flush()
+                if progress is not None and progress(name, read, done, total) is False:
+                    return count, False
+        if batch:
+            _flush()
+    if progress is not None:
+        progress(name, read, total, total)
+    return count, True
+
+
+def export_table(
+        db: sqlite3.Connection, name: str, folder: str, fmt: str = "json", batch_size: int = 1000, extra=()
+):
+    """
+    Write all rows of a table to folder/name.<suffix of fmt>, rows are streamed batch by batch.
+    extra: rows as dictionaries written after those of the table.
+    The file is written under a temporary name and renamed when complete.
+    :return: (number of rows, seconds)
+    """
+    suffix = FORMATS[fmt]
+    start = time.perf_counter()
+    cur = db.cursor()
+    cur.execute(f"PRAGMA table_info({name})")
+    keys = [x[1] for x in cur.fetchall() if x[1] not in LOCAL_KEYS.get(name, ())]
+    cur.execute(f"SELECT {','.join(keys)} FROM {name}")
+
+    array = fmt == "json"
+    opener = _OPENERS.get(os.path.splitext(suffix)[1])
+    fd, temp = tempfile.mkstemp(prefix=f".{name}", suffix=suffix, dir=folder)
+    count = 0
+    try:
+        with open(fd, "wb") as raw:
+            f = raw if opener is None else opener(raw, "wb")
+            with f:
+                if array:
+                    f.write(b"[")
+                batches = iter(lambda: [dict(zip(keys, row)) for row in cur.fetchmany(batch_size)], [])
+                extra = list(extra)
+                for rows in itertools.chain(batches, [extra] if extra else []):
+                    lines = (json.dumps(row, ensure_ascii=False) for row in rows)
+                    if array:
+                        text = ("," if count else "") + ",".join(lines)
+                    else:
+                        text = "".join(f"{line}\n" for line in lines)
+                    f.write(text.encode("UTF-8"))
+                    count += len(rows)
+                if array:
+                    f.write(b"]")
+        os.replace(temp, os.path.join(folder, name + suffix))
+    except BaseException:
+        os.remove(temp)
+        raise
+    return count, time.perf_counter() - start
@@ -0,0 +1,325 @@
+"""
+Command line access to the database without the editor window.
+Models are read from stdin and written to stdout as one JSON object per line (NDJSON).
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from factory.bodyfactory import BodyFactory, EXPORT_TABLES, ALL_TABLES
+from factory import catalogs, migration
+from factory.infofactory import InfoFactory
+from factory.revision import RevisionConflict
+from factory.transfer import FORMATS
+from model.bodymodel import BodyModel, Sentence, split_paragraph
+from pyscript.bulkcreate import create_from_rows
+from urllib.request import pathname2url
+from configuration import DATABASE_PATH
+
+
+# Models loaded per batch by get
+GET_BATCH = 500
+
+
+def read_rows(stream):
+    """
+    Objects of the NDJSON lines of stream, a line holding only a number is read as {"value": number}.
+    """
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {number}: {e}") from None
+        yield {"value": row} if isinstance(row, int) else row
+
+
+def read_values(args) -> list[int]:
+    if args.values:
+        return args.values
+    return [int(row["value"]) for row in read_rows(sys.stdin)]
+
+
+def write_row(row: dict):
+    sys.stdout.write(json.dumps(row, ensure_ascii=False))
+    sys.stdout.write("\n")
+
+
+def _batches(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def single_catalog(args) -> str | None:
+    if not args.catalog:
+        return None
+    if len(args.catalog) > 1:
+        raise ValueError(f"{args.command} works on one catalog")
+    return args.catalog[0]
+
+
+def database_path(args) -> str:
+    """
+    The file of --db, or of the single catalog given with --catalog.
+    """
+    name = single_catalog(args)
+    return args.db if name is None else catalogs.default().paths[name]
+
+
+def ensure_migrated(path: str):
+    """
+    Bring a database not opened by the editor yet to its schema through a writer, once.
+    Read-only factories never migrate, the commands reading with one would miss tables.
+    """
+    if not os.path.isfile(path):
+        return
+    db = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True)
+    try:
+        current = migration.version(db)
+    finally:
+        db.close()
+    if current >= migration.SCHEMA_VERSION:
+        return
+    try:
+        BodyFactory(path).close()
+    except sqlite3.Error as e:
+        raise ValueError(
+            f"{path}: database not migrated from schema version {current} to {migration.SCHEMA_VERSION} "
+            f"and cannot be written to migrate it: {e}"
+        ) from None
+
+
+def used_databases(args) -> list[str]:
+    """
+    The files a command may read, the catalogs included when it reads through them.
+    """
+    paths = [] if args.catalog else [args.db]
+    if args.catalog or catalogs.registry_for(args.db) is not None:
+        paths.extend(catalogs.default().paths.values())
+    return paths
+
+
+def open_factory(args, readonly: bool = False) -> BodyFactory:
+    """
+    The factory of --db, or of the single catalog given with --catalog, sharing the sentences of the others.
+    """
+    name = single_catalog(args)
+    if name is None:
+        return BodyFactory(args.db, readonly)
+    return catalogs.default().factory(name, readonly)
+
+
+def cmd_get(args):
+    factory = open_factory(args, readonly=True)
+    for values in _batches(read_values(args), GET_BATCH):
+        old_infos = factory.load_old_infos(values) if args.old_info else {}
+        for model in factory.load_many_by_values(values):
+            row = {
+                "value": model.value, "name": model.name, "revision": model.revision,
+                "sentences": [x.value for x in model]
+            }
+            if args.old_info:
+                row["old_info"] = old_infos[model.value]
+            write_row(row)
+
+
+def cmd_search(args):
+    if args.catalog:
+        hits = catalogs.default().search(args.keywords, args.sysid, args.filter, args.catalog)
+        for catalog, hit in hits:
+            write_row({"catalog": catalog, "value": hit.value, "name": hit.name, "source": hit.source})
+        return
+    factory = BodyFactory(args.db, readonly=True)
+    for hit in factory.produce_by_search(args.keywords, args.sysid, args.filter):
+        write_row({"value": hit.value, "name": hit.name, "source": hit.source})
+
+
+def cmd_counterpart(args):
+    factory = open_factory(args, readonly=True)
+    if args.missing:
+        for value in factory.models_without_counterpart(args.sysid):
+            write_row({"value": value, "counterpart": None})
+        return
+    for value in read_values(args):
+        write_row({"value": value, "counterpart": factory.counterparts.counterpart(value)})
+
+
+def cmd_save(args):
+    """
+    Rows are {"value", "sentences": [...]} or {"value", "paragraph"}, all are saved in one transaction.
+    With "revision", the model must not have been saved by someone else since, see get.
+    On a conflict nothing is saved and the diverged sentences are written instead.
+    """
+    factory = open_factory(args)
+    models = []
+    for row in read_rows(sys.stdin):
+        model = BodyModel(int(row["value"]), row.get("name", ""), revision=row.get("revision"))
+        if "sentences" in row:
+            model.sentences = (Sentence(x) for x in row["sentences"] if x.strip())
+        else:
+            model.sentences = split_paragraph(row.get("paragraph", "") + "\n")
+        models.append(model)
+    unknown = [x.value for x in models if x.value not in factory.navigation]
+    if unknown:
+        factory.close()
+        raise ValueError(f"unknown values: {unknown}")
+    try:
+        factory.saving_models(models)
+    except RevisionConflict as e:
+        for conflict in e.conflicts:
+            write_row({"conflict": True, **conflict._asdict()})
+        raise
+    finally:
+        factory.close()
+    for model in models:
+        write_row({"value": model.value, "revision": model.revision, "sentences": len(model)})
+
+
+def cmd_link(args):
+    info = InfoFactory(database_path(args))
+    links = info.patrilineal_links(read_values(args))
+    info.close()
+    for value, chain in links.items():
+        write_row({"value": value, "chain": [{"value": x.value, "name": x.name, "pval": x.pval} for x in chain]})
+
+
+def cmd_create(args):
+    """
+    Rows are {"name", "sysid", "is_parent", "sex", "pval"}, all are created in one transaction.
+    """
+    info = InfoFactory(database_path(args))
+    try:
+        strucs = create_from_rows(list(read_rows(sys.stdin)), info)
+    finally:
+        info.close()
+    for struc in strucs:
+        write_row({"value": struc.value, "name": struc.name, "pval": struc.pval})
+
+
+def cmd_progress(args):
+    if args.catalog:
+        matrices = catalogs.default().progress(args.catalog)
+        for catalog, matrix in matrices.items():
+            for (sysid, sex), (completed, total) in sorted(matrix.items()):
+                write_row({"catalog": catalog, "sysid": sysid, "sex": sex, "completed": completed, "total": total})
+        return
+    factory = BodyFactory(args.db, readonly=True)
+    for (sysid, sex), (completed, total) in sorted(factory.progress_matrix().items()):
+        write_row({"sysid": sysid, "sex": sex, "completed": completed, "total": total})
+
+
+def cmd_export(args):
+    tables = ALL_TABLES if args.all else EXPORT_TABLES
+    if args.catalog:
+        statistics = catalogs.default().export(args.folder, args.format, tables, args.catalog)
+        for catalog, tables in statistics.items():
+            for table, (rows, speed) in tables.items():
+                write_row({"catalog": catalog, "table": table, "rows": rows, "rows_per_sec": round(speed)})
+        return
+    factory = BodyFactory(args.db, readonly=True)
+    os.makedirs(args.folder, exist_ok=True)
+    for table, (rows, speed) in factory.export_database_json(args.folder, args.format, tables).items():
+        write_row({"table": table, "rows": rows, "rows_per_sec": round(speed)})
+
+
+def cmd_import(args):
+    factory = open_factory(args)
+
+    def _progress(table, rows, done, size):
+        if args.verbose:
+            print(f"{table}: {rows} rows {done * 100 // max(size, 1)}%", file=sys.stderr)
+        return True
+
+    try:
+        counts = factory.import_database_from_json(args.folder, args.batch_size, _progress)
+    finally:
+        factory.close()
+    for table, rows in counts.items():
+        write_row({"table": table, "rows": rows})
+
+
+def parser() -> argparse.ArgumentParser:
+    main = argparse.ArgumentParser(description=__doc__.strip())
+    main.add_argument("--db", default=DATABASE_PATH, help="database file")
+    main.add_argument(
+        "--catalog", action="append",
+        help="catalog of configuration.CATALOGS instead of --db, repeated for search, progress and export"
+    )
+    commands = main.add_subparsers(dest="command", required=True)
+
+    get = commands.add_parser("get", help="models with their sentences, values from arguments or stdin")
+    get.add_argument("values", type=int, nargs="*")
+    get.add_argument("--old-info", action="store_true", help="include the old info")
+    get.set_defaults(func=cmd_get)
+
+    search = commands.add_parser("search", help="models found by name, old info or sentence")
+    search.add_argument("keywords", nargs="?", default="")
+    search.add_argument("--sysid", type=int)
+    search.add_argument("--filter", type=int, default=0, choices=(0, 1, 2), help="0 all, 1 without sentences yet, 2 with sentences")
+    search.set_defaults(func=cmd_search)
+
+    counterpart = commands.add_parser(
+        "counterpart", help="same name models of the other gender, values from arguments or stdin"
+    )
+    counterpart.add_argument("values", type=int, nargs="*")
+    counterpart.add_argument("--missing", action="store_true", help="list every model without a counterpart")
+    counterpart.add_argument("--sysid", type=int, help="with --missing, only this system")
+    counterpart.set_defaults(func=cmd_counterpart)
+
+    save = commands.add_parser("save", help="replace the sentences of the models read from stdin")
+    save.set_defaults(func=cmd_save)
+
+    link = commands.add_parser("link", help="parent chains, values from arguments or stdin")
+    link.add_argument("values", type=int, nargs="*")
+    link.set_defaults(func=cmd_link)
+
+    create = commands.add_parser("create", help="new structures read from stdin")
+    create.set_defaults(func=cmd_create)
+
+    progress = commands.add_parser("progress", help="completed and total models per system and gender")
+    progress.set_defaults(func=cmd_progress)
+
+    export = commands.add_parser("export", help="export tables into a folder")
+    export.add_argument("folder")
+    export.add_argument("--format", default="json", choices=list(FORMATS))
+    export.add_argument("--all", action="store_true", help="include the structure tables")
+    export.set_defaults(func=cmd_export)
+
+    import_ = commands.add_parser("import", help="import the sentence tables of a folder")
+    import_.add_argument("folder")
+    import_.add_argument("--batch-size", type=int, default=1000)
+    import_.add_argument("-v", "--verbose", action="store_true", help="report progress on stderr")
+    import_.set_defaults(func=cmd_import)
+    return main
+
+
+def main(argv=None) -> int:
+    args = parser().parse_args(argv)
+    sys.stdout.reconfigure(encoding="UTF-8")
+    try:
+        for path in used_databases(args):
+            ensure_migrated(path)
+        args.func(args)
+    except (ValueError, KeyError, FileNotFoundError) as e:
+        print(f"{args.command}: {e}", file=sys.stderr)
+        return 1
+    except sqlite3.Error as e:
+        # Not a database, a damaged one, or one without the tables of the editor
+        print(f"{args.command}: {','.join(args.catalog) if args.catalog else args.db}: {e}", file=sys.stderr)
+        return 1
+    except RevisionConflict as e:
+        print(f"{args.command}: {e}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        # The reader of stdout stopped early, e.g. head
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        catalogs.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
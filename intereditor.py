@@ -1,14 +1,68 @@
+import argparse
+import json
 import sys
-from PySide6.QtWidgets import QApplication
-from interface.main_window import MainWindow
+import time
+
+
+def measure_startup(app, window, started: float, marks: dict):
+    """
+    Print the milliseconds from start until the first paint and the first model, then quit.
+    """
+    from PySide6.QtCore import QEvent, QObject
+
+    def _mark(name: str):
+        # Each mark is taken once, so the report is printed once, when the second arrives
+        if name in marks:
+            return
+        marks[name] = (time.perf_counter() - started) * 1000
+        if "first_paint_ms" in marks and "model_ready_ms" in marks:
+            print(json.dumps(marks))
+            app.quit()
+
+    class _PaintFilter(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint:
+                window.removeEventFilter(self)
+                _mark("first_paint_ms")
+            return False
+
+    paint_filter = _PaintFilter(window)
+    window.installEventFilter(paint_filter)
+    window.model_ready.connect(lambda: _mark("model_ready_ms"))
 
 
 def main():
-    app = QApplication(sys.argv)
+    started = time.perf_counter()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--trace", nargs="?", const="", metavar="REPORT",
+        help="record action latency and SQL statements (F12), optionally dumped to a JSON file on exit"
+    )
+    parser.add_argument(
+        "--startup-time", action="store_true",
+        help="print the time to import, to the first paint and to the first model as JSON, then quit"
+    )
+    args, qt_args = parser.parse_known_args()
+
+    # Qt and the windows are imported after the arguments, so the import time can be measured
+    from PySide6.QtWidgets import QApplication
+    from interface.main_window import MainWindow
+    from factory import trace
+    marks = {"import_ms": (time.perf_counter() - started) * 1000}
+    if args.trace is not None:
+        trace.recorder.enable()
+
+    app = QApplication(sys.argv[:1] + qt_args)
     window = MainWindow()
+    marks["window_ms"] = (time.perf_counter() - started) * 1000
+    if args.startup_time:
+        measure_startup(app, window, started, marks)
     window.show()
     app.exec()
 
+    if args.trace:
+        trace.recorder.dump(args.trace)
+
 
 if __name__ == '__main__':
     main()
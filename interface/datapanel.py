@@ -1,7 +1,9 @@
 from PySide6.QtWidgets import *
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QIcon
-from factory.bodyfactory import BodyFactory
+from factory.bodyfactory import BodyFactory, EXPORT_TABLES, ALL_TABLES
+from factory.transfer import FORMATS
+from factory.completion import percentage
 from configuration import (
     UI_FONTFAMILY, UI_FONTSIZE, SYSTEMS, GENDERS
 )
@@ -19,7 +21,11 @@ class DatePanel(QDialog):
 
         self.lab = QLabel("当前完成度：", parent=self)
         self.progress_bar = QProgressBar(self)
+        # Percentage of every system x gender
+        self.matrix_table = QTableWidget(len(SYSTEMS), 3, self)
 
+        self.export_format = QComboBox(self)
+        self.export_all = QCheckBox("包含结构表", self)
         self.export_data = QPushButton("导出数据")
         self.import_data = QPushButton("导入数据")
 
@@ -32,9 +38,12 @@ class DatePanel(QDialog):
         layout1 = QVBoxLayout()
         layout1.addWidget(self.lab)
         layout1.addWidget(self.progress_bar)
+        layout1.addWidget(self.matrix_table)
         layout1.setContentsMargins(0, 10, 0, 0)
 
         layout2 = QHBoxLayout()
+        layout2.addWidget(self.export_format)
+        layout2.addWidget(self.export_all)
         layout2.addWidget(self.export_data)
         layout2.addWidget(self.import_data)
         layout2.setContentsMargins(0, 10, 0, 0)
@@ -72,6 +81,16 @@ class DatePanel(QDialog):
         self.progress_bar.resize(300, 20)
         self.progress_bar.setRange(0, 100)
 
+        self.matrix_table.setFont(font)
+        self.matrix_table.setHorizontalHeaderLabels(["男", "女", "合计"])
+        self.matrix_table.setVerticalHeaderLabels(SYSTEMS)
+        self.matrix_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.matrix_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+
+        self.export_format.addItems(FORMATS)
+        self.export_format.setFont(font)
+        self.export_all.setFont(font)
+
         self.export_data.setFont(font)
         self.export_data.clicked.connect(self.export_database)
 
@@ -95,16 +114,26 @@ class DatePanel(QDialog):
         return gender
 
     def show_progress(self):
-        self.progress_bar.setValue(
-            self.factory.percentage_of_progress_completed(sysid=self.current_sysid, gender=self.current_gender)
-        )
+        """
+        Show the selected percentage and the whole matrix from a single read.
+        """
+        counters = self.factory.progress_matrix()
+        self.progress_bar.setValue(percentage(counters, self.current_sysid, self.current_gender))
+        for row in range(len(SYSTEMS)):
+            sysid = None if row == 0 else row - 1
+            for column, gender in enumerate((0, 1, None)):
+                self.matrix_table.setItem(row, column, QTableWidgetItem(f"{percentage(counters, sysid, gender)}%"))
 
     def export_database(self):
         try:
             filepath = QFileDialog(self).getExistingDirectory(self, "选择存储路径")
             if len(filepath):
-                self.factory.export_database_json(filepath)
-                QMessageBox().information(self, "Good", "导出成功！")
+                tables = ALL_TABLES if self.export_all.isChecked() else EXPORT_TABLES
+                statistics = self.factory.export_database_json(filepath, self.export_format.currentText(), tables)
+                contents = (
+                    f"{item} 表导出 {number} 条数据（{speed:.0f} 条/秒）" for item, (number, speed) in statistics.items()
+                )
+                QMessageBox().information(self, "Good", "导出成功！\n" + "；\n".join(contents) + '。')
         except Exception as e:
             QMessageBox().critical(self, "Error", f"导出数据发生错误。\n错误原因：\n{e}")
 
@@ -112,8 +141,27 @@ class DatePanel(QDialog):
         try:
             filepath = QFileDialog(self).getExistingDirectory(self, "选择存储路径")
             if len(filepath):
-                statistics = self.factory.import_database_from_json(filepath)
+                dialog = QProgressDialog("正在导入数据……", "取消", 0, 1000, self)
+                dialog.setWindowTitle("导入数据")
+                dialog.setWindowModality(Qt.WindowModality.WindowModal)
+                dialog.setMinimumDuration(0)
+                # Every table runs to the maximum once
+                dialog.setAutoReset(False)
+                dialog.setAutoClose(False)
+
+                def _progress(table, rows, done, total):
+                    dialog.setLabelText(f"正在导入 {table} 表：已读取 {rows} 条数据")
+                    dialog.setValue(int(done / total * 1000) if total else 1000)
+                    QApplication.processEvents()
+                    return not dialog.wasCanceled()
+
+                statistics = self.factory.import_database_from_json(filepath, progress=_progress)
+                canceled = dialog.wasCanceled()
+                dialog.close()
                 contents = (f"{item} 表成功导入 {statistics[item]} 条数据" for item in statistics)
-                QMessageBox().information(self, "Good", "；\n".join(contents) + '。')
+                QMessageBox().information(
+                    self, "Good", ("导入已取消。\n" if canceled else "") + "；\n".join(contents) + '。'
+                )
+                self.show_progress()
         except Exception as e:
             QMessageBox().critical(self, "Error", f"导入数据发生错误。\n错误原因：{e}")
@@ -0,0 +1,93 @@
+from PySide6.QtWidgets import *
+from PySide6.QtCore import Qt
+from factory.trace import recorder
+from configuration import (
+    UI_FONTFAMILY, UI_FONTSIZE
+)
+
+
+class DebugPanel(QDialog):
+    """
+    Latency of every recorded action and the statements of the selected one.
+    """
+    __columns = ["动作", "次数", "平均(ms)", "最长(ms)", "查询/次", "SQL(ms)"]
+
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setWindowTitle("性能记录")
+        self.setMinimumWidth(int(parent.width() * 0.8))
+        self.report = {}
+
+        self.action_table = QTableWidget(0, len(self.__columns), self)
+        self.statement_table = QTableWidget(0, 3, self)
+        self.refresh_button = QPushButton("刷新")
+        self.reset_button = QPushButton("清空")
+        self.dump_button = QPushButton("导出JSON")
+
+        layout0 = QHBoxLayout()
+        layout0.addWidget(self.refresh_button)
+        layout0.addWidget(self.reset_button)
+        layout0.addWidget(self.dump_button)
+        layout0.setAlignment(Qt.AlignmentFlag.AlignRight)
+
+        layout_ = QVBoxLayout()
+        layout_.addWidget(self.action_table)
+        layout_.addWidget(self.statement_table)
+        layout_.addLayout(layout0)
+        self.setLayout(layout_)
+        self._style()
+        self.refresh()
+
+    def _style(self):
+        font = self.font()
+        font.setFamily(UI_FONTFAMILY)
+        font.setPointSize(UI_FONTSIZE)
+        for widget in (self.refresh_button, self.reset_button, self.dump_button):
+            widget.setFont(font)
+
+        font.setPointSize(UI_FONTSIZE - 1)
+        for table in (self.action_table, self.statement_table):
+            table.setFont(font)
+            table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+            table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.action_table.setHorizontalHeaderLabels(self.__columns)
+        self.action_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.action_table.itemSelectionChanged.connect(self.show_statements)
+        self.statement_table.setHorizontalHeaderLabels(["语句", "次数", "耗时(ms)"])
+        self.statement_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+
+        self.refresh_button.clicked.connect(self.refresh)
+        self.reset_button.clicked.connect(self.reset)
+        self.dump_button.clicked.connect(self.dump)
+
+    def refresh(self):
+        self.report = recorder.report()
+        self.action_table.setRowCount(len(self.report))
+        for row, (name, item) in enumerate(self.report.items()):
+            cells = (
+                name, str(item["calls"]), f"{item['mean_ms']:.2f}", f"{item['max_ms']:.2f}",
+                f"{item['queries_per_call']:.1f}", f"{item['sql_ms']:.2f}"
+            )
+            for column, text in enumerate(cells):
+                self.action_table.setItem(row, column, QTableWidgetItem(text))
+        self.statement_table.setRowCount(0)
+
+    def show_statements(self):
+        rows = self.action_table.selectionModel().selectedRows()
+        if not rows:
+            return
+        name = self.action_table.item(rows[0].row(), 0).text()
+        statements = self.report[name]["statements"]
+        self.statement_table.setRowCount(len(statements))
+        for row, item in enumerate(statements):
+            for column, text in enumerate((item["sql"], str(item["count"]), f"{item['ms']:.2f}")):
+                self.statement_table.setItem(row, column, QTableWidgetItem(text))
+
+    def reset(self):
+        recorder.reset()
+        self.refresh()
+
+    def dump(self):
+        filename, _ = QFileDialog.getSaveFileName(self, "导出JSON", "trace.json", "JSON (*.json)")
+        if filename:
+            recorder.dump(filename)
@@ -0,0 +1,11 @@
+from functools import cache
+from PySide6.QtGui import QIcon
+from configuration import GENDERS
+
+
+@cache
+def gender_icon(gender: int) -> QIcon:
+    """
+    Shared gender icon, the png is read only once.
+    """
+    return QIcon(GENDERS[gender])
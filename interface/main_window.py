@@ -1,17 +1,33 @@
 from PySide6.QtWidgets import *
 from PySide6.QtCore import *
 from PySide6.QtGui import *
-from interface.preview import PreviewWindow
-from interface.search import SearchWindow
-from interface.display import DisplayWindow
-from interface.datapanel import DatePanel
+from interface.icons import gender_icon
+from interface.sentencelist import SentenceListModel
+from factory import catalogs, trace
 from factory.bodyfactory import BodyFactory, write_cache_model, load_cache_model
+from factory.revision import Conflict, RevisionConflict
 from configuration import (
-    WINDOW_ICON_PATH, UI_FONTFAMILY, UI_FONTSIZE, GENDERS
+    WINDOW_ICON_PATH, UI_FONTFAMILY, UI_FONTSIZE, PREFETCH_COUNT
 )
 
 
+class PrefetchWorker(QRunnable):
+    """
+    Load the models around the current one into the cache on the prefetching thread.
+    """
+    def __init__(self, factory: BodyFactory, values: list[int]):
+        super().__init__()
+        self.factory = factory
+        self.values = values
+
+    def run(self):
+        self.factory.prefetch(self.values)
+
+
 class MainWindow(QMainWindow):
+    # Emitted once the first model is shown
+    model_ready = Signal()
+
     def __init__(self):
         super().__init__(None)
         # Window settings
@@ -23,8 +39,8 @@ class MainWindow(QMainWindow):
         self.setWindowIcon(QIcon(WINDOW_ICON_PATH))
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
 
-        # Auxiliary window
-        self.assist_window = DisplayWindow(self)
+        # Secondary windows, built on first use and reused
+        self.__windows = {}
 
         # UI widgets
         self.widgets = {}
@@ -54,13 +70,52 @@ class MainWindow(QMainWindow):
         main_widget.setLayout(main_layout)
         self.setCentralWidget(main_widget)
 
-        # Initialize model
+        # Neighbours are loaded one batch at a time, a newer batch replaces a queued one
+        # The thread is kept, a replacement would open another read-only connection
+        self.prefetch_pool = QThreadPool(self)
+        self.prefetch_pool.setMaxThreadCount(1)
+        self.prefetch_pool.setExpiryTimeout(-1)
+        # The database is opened once the event loop runs, the window is painted first
+        self.factory = None
+        self.body = None
+        main_widget.setEnabled(False)
+        QTimer.singleShot(0, self.initialize_model)
+
+    def initialize_model(self):
+        """
+        Open the database and show the model of the last session.
+        """
         value = load_cache_model()
         if value is None:
             value = 100000
         self.factory = BodyFactory()
         self.body = self.factory.create_by_value(value)
         self.load_model()
+        self.centralWidget().setEnabled(True)
+        self.model_ready.emit()
+
+    def secondary_window(self, key: str):
+        """
+        The secondary window of key, its module is imported and the window built on first use.
+        """
+        if key not in self.__windows:
+            match key:
+                case "display":
+                    from interface.display import DisplayWindow
+                    self.__windows[key] = DisplayWindow(self)
+                case "search_single" | "search_multi":
+                    from interface.search import SearchWindow
+                    self.__windows[key] = SearchWindow(self, self.factory, multi_mode=key == "search_multi")
+                case "preview":
+                    from interface.preview import PreviewWindow
+                    self.__windows[key] = PreviewWindow(self)
+                case "data":
+                    from interface.datapanel import DatePanel
+                    self.__windows[key] = DatePanel(self, self.factory)
+                case "debug":
+                    from interface.debugpanel import DebugPanel
+                    self.__windows[key] = DebugPanel(self)
+        return self.__windows[key]
 
     def __add_widgets(self):
         # Model's ID input/display
@@ -109,11 +164,15 @@ class MainWindow(QMainWindow):
         self.widgets['info'] = QPlainTextEdit()
         self.widgets['info'].setFrameShape(QFrame(self.widgets['info']).frameShape().WinPanel)
 
-        # Sentence display box
-        self.widgets['sentence'] = QListWidget(self)
+        # Sentence display box, only changed rows are updated and laid out
+        self.sentence_model = SentenceListModel(self)
+        self.widgets['sentence'] = QListView(self)
+        self.widgets['sentence'].setModel(self.sentence_model)
         self.widgets['sentence'].setWordWrap(True)
+        self.widgets['sentence'].setLayoutMode(QListView.LayoutMode.Batched)
+        self.widgets['sentence'].setBatchSize(50)
         self.widgets['sentence'].setFrameShape(QFrame(self.widgets['sentence']).frameShape().WinPanel)
-        self.widgets['sentence'].setSelectionMode(QListWidget.SelectionMode.MultiSelection)
+        self.widgets['sentence'].setSelectionMode(QListView.SelectionMode.MultiSelection)
 
         # Load original information
         self.widgets['addoldinfo'] = QPushButton("显示原始数据", self)
@@ -135,33 +194,47 @@ class MainWindow(QMainWindow):
         """
         Load model data.
         """
-        self.widgets['gender_icon'].setIcon(QIcon(GENDERS[self.body.gender()]))
+        self.widgets['gender_icon'].setIcon(gender_icon(self.body.gender()))
         self.widgets['name'].setText(self.body.name)
         self.widgets['modelid'].setValue(self.body.value)
         self.widgets['info'].setPlainText(self.body.paragraph)
         self.display_sentences_list()
+        self.prefetch_neighbours()
+
+    def prefetch_neighbours(self):
+        """
+        Warm the cache with the models the browsing buttons lead to.
+        """
+        navigation = self.factory.navigation
+        if self.body.value not in navigation:
+            return
+        self.prefetch_pool.clear()
+        self.prefetch_pool.start(PrefetchWorker(
+            self.factory, navigation.neighbours(self.body.value, PREFETCH_COUNT)
+        ))
 
     def display_sentences_list(self):
         """
         Show sentence list.
         """
-        self.widgets['sentence'].clear()
-        for i, item in enumerate(self.body, start=1):
-            self.widgets['sentence'].addItem(f"{i}. {item.value}")
+        self.sentence_model.set_sentences(self.body.sentences)
 
+    @trace.action()
     def previous_model(self):
         self.body = self.factory.setup_model(self.body.value, direction=-1)
         self.load_model()
 
+    @trace.action()
     def next_model(self):
         self.body = self.factory.setup_model(self.body.value, direction=1)
         self.load_model()
 
     def jump_model(self):
         try:
-            value = self.widgets['modelid'].value()
-            self.body = self.factory.setup_model(value=value)
-            self.load_model()
+            with trace.measure("jump_model"):
+                value = self.widgets['modelid'].value()
+                self.body = self.factory.setup_model(value=value)
+                self.load_model()
         except ValueError:
             QMessageBox().warning(self, "警告", "Id 格式错误。")
 
@@ -171,8 +244,9 @@ class MainWindow(QMainWindow):
         """
         try:
             modelvals = self.search_model_single()
-            self.body = self.factory.setup_model(value=modelvals)
-            self.load_model()
+            with trace.measure("specify_model_from_search"):
+                self.body = self.factory.setup_model(value=modelvals)
+                self.load_model()
         except AssertionError:
             pass
 
@@ -181,20 +255,34 @@ class MainWindow(QMainWindow):
         Save information（Sentence shall prevail.
         """
         if self.warning("确定以当前所填内容保存吗？"):
+            reload = True
             try:
                 self.body.paragraph = self.widgets['info'].toPlainText()
                 if len(self.body.paragraph) == 0:
                     self.body.clean_sentences()
                 else:
                     self.body.convert_into_sentences()
+                try:
+                    with trace.measure("save_info"):
+                        self.factory.saving_model(self.body)
+                except RevisionConflict as e:
+                    # Without overwriting, the edit stays on screen and nothing is saved
+                    reload = self.overwrite_conflict(e.conflicts[0])
+                    if not reload:
+                        return
+                    self.body.revision = None
+                    with trace.measure("save_info"):
+                        self.factory.saving_model(self.body)
             except Exception as e:
                 QMessageBox().critical(self, "错误", f"保存信息发生错误。\n错误原因：\n{e}")
             else:
                 QMessageBox().information(self, "Good", "保存成功！")
                 write_cache_model(self.body.value)
             finally:
-                self.body = self.factory.setup_model(value=self.body.value)
-                self.load_model()
+                if reload:
+                    with trace.measure("save_info:reload"):
+                        self.body = self.factory.setup_model(value=self.body.value)
+                        self.load_model()
 
     def add_sentences_from_search(self):
         """
@@ -202,9 +290,11 @@ class MainWindow(QMainWindow):
         """
         try:
             value = self.search_model_single()
-            sentences = self.factory.produce_sentences_by_value(value)
-            self.body.add_into_paragraph(sentences)
-            self.widgets['info'].appendPlainText(self.body.paragraph)
+            with trace.measure("add_sentences_from_search"):
+                sentences = self.factory.produce_sentences_by_value(value)
+                self.body.paragraph = self.widgets['info'].toPlainText()
+                self.body.add_into_paragraph(sentences)
+                self.widgets['info'].setPlainText(self.body.paragraph)
         except AssertionError:
             QMessageBox().warning(self, "警告", "没有信息可以被添加。")
         except Exception as e:
@@ -215,9 +305,10 @@ class MainWindow(QMainWindow):
         Split sentences.
         """
         try:
-            self.body.paragraph = self.widgets['info'].toPlainText()
-            self.body.convert_into_sentences()
-            self.display_sentences_list()
+            with trace.measure("load_sentences_list"):
+                self.body.paragraph = self.widgets['info'].toPlainText()
+                self.body.convert_into_sentences()
+                self.display_sentences_list()
         except AssertionError:
             QMessageBox().critical(self, "错误", f"内容为空白。")
 
@@ -227,21 +318,21 @@ class MainWindow(QMainWindow):
         """
         try:
             # 获取句子对象
-            sentences = [self.body[i.row()] for i in self.widgets['sentence'].selectedIndexes()]
+            sentences = [self.body[i.row()] for i in self.widgets['sentence'].selectionModel().selectedIndexes()]
             assert len(sentences) > 0
             # 将句子关联到选中的模型中
             modelvals = self.search_model_multi()
-            models = []
-            for item in modelvals:
-                model_item = self.factory.create_by_value(item)
-                model_item.add_into_sentences(sentences)
-                model_item.convert_for_paragraph()
-                models.append(model_item)
-            # 生成所有模型信息的预览， 等待确认
-            agree_preview = PreviewWindow(self, models)
-            if agree_preview.exec():
+            with trace.measure("sentence_put_others"):
+                models = self.factory.create_many_by_values(modelvals)
                 for model_item in models:
-                    self.factory.saving_model(model_item)
+                    model_item.add_into_sentences(sentences)
+                    model_item.convert_for_paragraph()
+                # 生成所有模型信息的预览， 等待确认
+                agree_preview = self.secondary_window("preview")
+                agree_preview.show_models(models)
+            if agree_preview.exec():
+                with trace.measure("sentence_put_others:save"):
+                    self.factory.saving_models(models)
                 QMessageBox().information(self, "Good", "关联成功！")
         except AssertionError:
             QMessageBox().critical(self, "错误", f"请做出完整的选择。")
@@ -252,7 +343,8 @@ class MainWindow(QMainWindow):
         """
         Common callback method of search window with single select.
         """
-        popup = SearchWindow(self, self.factory, multi_mode=False)
+        popup = self.secondary_window("search_single")
+        popup.prepare()
         popup.exec()
         modelvals = popup.get_selected_models()
         assert len(modelvals)
@@ -262,38 +354,55 @@ class MainWindow(QMainWindow):
         """
         Common callback method of search window with multi select.
         """
-        popup = SearchWindow(self, self.factory, multi_mode=True)
+        popup = self.secondary_window("search_multi")
+        popup.prepare()
         popup.exec()
         modelvals = popup.get_selected_models()
         assert len(modelvals)
         return modelvals
 
+    @trace.action()
     def show_oldinfo_context(self):
         """
         Show old info data.
         """
-        if self.assist_window.isVisible():
-            self.assist_window.hide()
+        assist_window = self.secondary_window("display")
+        if assist_window.isVisible():
+            assist_window.hide()
         else:
-            self.assist_window.display_info(self.factory, self.body)
-            self.assist_window.show()
+            assist_window.display_info(self.factory, self.body)
+            assist_window.show()
 
     def management_database(self):
         """
         Popup of manage data.
         """
-        manager = DatePanel(self, self.factory)
+        manager = self.secondary_window("data")
+        with trace.measure("management_database"):
+            manager.show_progress()
         manager.exec()
 
+    @trace.action()
     def change_gender(self):
         """
         Change opposite gender with same name.
         """
-        for model_res in self.factory.produce_by_search(self.body.name, None, 0):
-            if model_res.name == self.body.name and model_res.gender() != self.body.gender():
-                self.body = self.factory.create_by_value(model_res.value)
-                self.load_model()
-                break
+        counterpart = self.factory.counterpart_model(self.body.value)
+        if counterpart is not None:
+            self.body = counterpart
+            self.load_model()
+
+    def overwrite_conflict(self, conflict: Conflict) -> bool:
+        """
+        Show what someone else saved meanwhile, True to overwrite it.
+        """
+        theirs = "\n".join(f"  - {x}" for x in conflict.theirs) or "  （无）"
+        ours = "\n".join(f"  + {x}" for x in conflict.ours) or "  （无）"
+        return self.warning(
+            f"该模型已被他人修改（版本 {conflict.revision}）。\n"
+            f"仅在数据库中的句子：\n{theirs}\n仅在当前编辑中的句子：\n{ours}\n"
+            "确定以当前内容覆盖吗？取消则保留当前编辑，不做保存。"
+        )
 
     def warning(self, context: str) -> bool:
         """
@@ -319,9 +428,14 @@ class MainWindow(QMainWindow):
         Rewrite the window close event.
         """
         if self.warning("退出前确认是否保存。\n确认退出？\n"):
-            write_cache_model(self.body.value)
-            self.factory.close()
-            del self.assist_window
+            self.prefetch_pool.clear()
+            self.prefetch_pool.waitForDone()
+            if self.factory is not None:
+                write_cache_model(self.body.value)
+                self.factory.close()
+            catalogs.shutdown()
+            for window in self.__windows.values():
+                window.close()
             event.accept()
         else:
             event.ignore()
@@ -330,6 +444,8 @@ class MainWindow(QMainWindow):
         """
         Rewrite the key response event.
         """
+        if self.body is None:
+            return
         match event.key():
             case Qt.Key.Key_Return | Qt.Key.Key_Enter:
                 if self.widgets['modelid'].hasFocus():
@@ -341,6 +457,11 @@ class MainWindow(QMainWindow):
             case Qt.Key.Key_Right:
                 self.next_model()
 
+            case Qt.Key.Key_F12 if trace.recorder.enabled:
+                debug_panel = self.secondary_window("debug")
+                debug_panel.refresh()
+                debug_panel.exec()
+
     def resizeEvent(self, event: QResizeEvent):
         """
         Rewind window size change event.
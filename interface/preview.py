@@ -8,17 +8,34 @@ from configuration import (
 
 
 class PreviewWindow(QDialog):
-    def __init__(self, parent: QWidget, models: list[BodyModel]):
+    def __init__(self, parent: QWidget, models: list[BodyModel] = ()):
         super().__init__(parent)
         self.setWindowTitle("预览并确认是否关联")
         # Scrolling area - Used to fill many text boxes
-        scroll = QScrollArea(self)
-        scroll.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
-        scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        scroll.setMinimumWidth(1050 if len(models) > 4 else len(models) * 250 + 50)
+        self.scroll = QScrollArea(self)
+        self.scroll.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOn)
+        self.scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+
+        # Twice confirmation button
+        btns = QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
+        btnbox = QDialogButtonBox(btns)
+        btnbox.accepted.connect(self.accept)
+        btnbox.rejected.connect(self.reject)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.scroll)
+        layout.addWidget(btnbox)
+        self.setLayout(layout)
+        self.show_models(models)
+
+    def show_models(self, models: list[BodyModel]):
+        """
+        Replace the previewed models, the window itself is reused.
+        """
+        self.scroll.setMinimumWidth(1050 if len(models) > 4 else len(models) * 250 + 50)
 
         # Widget directly hosted by the scroll area and Table layout for textbox
-        widget = QWidget(scroll)
+        widget = QWidget(self.scroll)
         gbox = QGridLayout(widget)
         font = QFont(UI_FONTFAMILY, UI_FONTSIZE)
         # Put four text boxes per row
@@ -31,15 +48,5 @@ class PreviewWindow(QDialog):
             textarea.setText(f"{models[i].value} {models[i].name}\n\n{models[i].paragraph}")
             gbox.addWidget(textarea, i // 4, i % 4)
         widget.setLayout(gbox)
-        scroll.setWidget(widget)
-
-        # Twice confirmation button
-        btns = QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
-        btnbox = QDialogButtonBox(btns)
-        btnbox.accepted.connect(self.accept)
-        btnbox.rejected.connect(self.reject)
-
-        layout = QVBoxLayout()
-        layout.addWidget(scroll)
-        layout.addWidget(btnbox)
-        self.setLayout(layout)
+        # The previous widget is deleted by the scroll area
+        self.scroll.setWidget(widget)
@@ -1,12 +1,160 @@
+import sqlite3
 from PySide6.QtWidgets import *
-from PySide6.QtGui import QIcon
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QObject, QRunnable, QThreadPool, QTimer, Signal
 from factory.bodyfactory import BodyFactory
+from factory import fulltext, trace
+from interface.icons import gender_icon
 from configuration import (
-    GENDERS, UI_FONTSIZE, UI_FONTFAMILY, SYSTEMS
+    UI_FONTSIZE, UI_FONTFAMILY, SYSTEMS
 )
 
 
+# One background thread searches with its own read-only connection
+_search_pool = None
+
+
+def search_pool() -> QThreadPool:
+    global _search_pool
+    if _search_pool is None:
+        _search_pool = QThreadPool()
+        _search_pool.setMaxThreadCount(1)
+        _search_pool.setExpiryTimeout(-1)
+    return _search_pool
+
+
+class SearchSignals(QObject):
+    # generation, page, whether it follows the shown hits
+    finished = Signal(int, list, bool)
+
+
+class SearchWorker(QRunnable):
+    """
+    Fetch a page of a search on the search thread, the first one or the one after a hit.
+    The query is interrupted as soon as a newer search has been started.
+    """
+    def __init__(self, signals: SearchSignals, path: str, generation: int, condition: tuple, after, is_stale):
+        super().__init__()
+        self.signals = signals
+        self.path = path
+        self.generation = generation
+        self.condition = condition
+        self.after = after
+        self.is_stale = is_stale
+
+    def run(self):
+        if self.is_stale():
+            return
+        factory = BodyFactory(self.path, readonly=True)
+        # A non-zero return value of the handler aborts the running statement
+        factory.db.set_progress_handler(self.is_stale, 1000)
+        try:
+            with trace.measure("search_model:query" if self.after is None else "search_model:next_page"):
+                page = list(factory.produce_hits_by_search(*self.condition, after=self.after))
+        except sqlite3.OperationalError:
+            return
+        finally:
+            factory.db.set_progress_handler(None, 0)
+        try:
+            self.signals.finished.emit(self.generation, page, self.after is not None)
+        except RuntimeError:
+            # The search window has been closed
+            pass
+
+
+class SearchResultModel(QAbstractListModel):
+    # Shown behind models which were not found by name
+    __source_marks = {
+        fulltext.SOURCE_NAME: "",
+        fulltext.SOURCE_INFO: "  〔原信息〕",
+        fulltext.SOURCE_SENTENCE: "  〔句子〕"
+    }
+
+    def __init__(self, parent: QWidget, factory: BodyFactory):
+        super().__init__(parent)
+        self.factory = factory
+        self.condition = ("", None, 0)
+        self.hits = []
+        self.exhausted = True
+        # A next page is being fetched
+        self.loading = False
+        # Only results of the latest search are published
+        self.generation = 0
+        self.signals = SearchSignals(self)
+        self.signals.finished.connect(self.__publish)
+
+    def search(self, keywords: str, sysid: int | None, filter_model: int):
+        """
+        Start a new search in background, a running older one is cancelled.
+        """
+        self.generation += 1
+        self.condition = (keywords, sysid, filter_model)
+        self.exhausted = True
+        self.loading = False
+        self.__start(None)
+
+    def __start(self, after):
+        """
+        Fetch the page after the given hit of the current search in background.
+        """
+        generation = self.generation
+        search_pool().start(SearchWorker(
+            self.signals, self.factory.path, generation, self.condition, after, lambda: self.generation != generation
+        ))
+
+    def cancel(self):
+        self.generation += 1
+        self.loading = False
+
+    def __publish(self, generation: int, page: list, appended: bool):
+        """
+        Show the first page of a finished search, or append the next one.
+        """
+        if generation != self.generation:
+            return
+        self.exhausted = len(page) < self.factory.page_size
+        if not appended:
+            self.beginResetModel()
+            self.hits = page
+            self.endResetModel()
+            return
+        self.loading = False
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.hits), len(self.hits) + len(page) - 1)
+            self.hits.extend(page)
+            self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.hits)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        hit = self.hits[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{hit.value_()} {hit.name}{self.__source_marks[hit.source]}"
+        if role == Qt.ItemDataRole.DecorationRole:
+            return gender_icon(hit.gender())
+        return None
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self.exhausted and not self.loading
+
+    def fetchMore(self, parent):
+        """
+        Load the next page after the last hit on the search thread, it is appended when it arrives.
+        """
+        if parent.isValid() or self.exhausted or self.loading or not self.hits:
+            return
+        self.loading = True
+        self.__start(self.hits[-1])
+
+    def value(self, row: int) -> int:
+        return self.hits[row].value
+
+
 class SearchWindow(QDialog):
+    __debounce_ms = 250
+
     def __init__(self, parent: QWidget, factory: BodyFactory, multi_mode: bool):
         super().__init__(parent)
         self.factory = factory
@@ -14,24 +162,34 @@ class SearchWindow(QDialog):
         self.setWindowTitle("搜索模型")
         # Search input
         self.search_text = QLineEdit()
+        self.search_text.textChanged.connect(self.schedule_search)
+        # Search again after typing paused
+        self.debounce = QTimer(self)
+        self.debounce.setSingleShot(True)
+        self.debounce.setInterval(self.__debounce_ms)
+        self.debounce.timeout.connect(self.search_model)
         # Search button
         self.search_push = QPushButton("搜索", self)
         self.search_push.clicked.connect(self.search_model)
         # Filter by system
         self.system_list = QComboBox(self)
         self.system_list.addItems(SYSTEMS)
+        self.system_list.currentIndexChanged.connect(self.search_model)
         # Filter which had be edited
         self.mode_list = QComboBox(self)
         self.mode_list.addItems(["全部", "无信息的", "有信息的"])
-        # Modle list of result and list widget of result
-        self.result = []
-        self.result_list = QListWidget(self)
+        self.mode_list.currentIndexChanged.connect(self.search_model)
+        # Modle list of result, pages are loaded while scrolling
+        self.result = SearchResultModel(self, factory)
+        self.result_list = QListView(self)
+        self.result_list.setModel(self.result)
+        self.result_list.setUniformItemSizes(True)
         if multi_mode:
             # Multiple choice mode
-            self.result_list.setSelectionMode(QListWidget.SelectionMode.MultiSelection)
+            self.result_list.setSelectionMode(QListView.SelectionMode.MultiSelection)
         else:
             # Single choice mode
-            self.result_list.setSelectionMode(QListWidget.SelectionMode.SingleSelection)
+            self.result_list.setSelectionMode(QListView.SelectionMode.SingleSelection)
 
         self.sure_push = QPushButton("选好了", self)
         self.sure_push.clicked.connect(self.accept)
@@ -70,7 +228,20 @@ class SearchWindow(QDialog):
         font.setFamily("黑体")
         self.result_list.setFont(font)
 
+    def prepare(self):
+        """
+        Clear the selection of a reused window, shown results are searched again as data may have changed.
+        """
+        self.result_list.clearSelection()
+        if self.result.rowCount():
+            self.search_model()
+
+    def schedule_search(self):
+        self.debounce.start()
+
+    @trace.action()
     def search_model(self):
+        self.debounce.stop()
         # Keywords
         keystring = self.search_text.text()
         keystring = keystring.strip()
@@ -83,16 +254,14 @@ class SearchWindow(QDialog):
         keyfiltermode = self.mode_list.currentIndex()
 
         # Search and display
-        self.result.clear()
-        self.result_list.clear()
-        self.result = [*self.factory.produce_by_search(keystring, keysysid, keyfiltermode)]
-        for _model in self.result:
-            _listitem = QListWidgetItem()
-            _listitem.setIcon(QIcon(GENDERS[_model.gender()]))
-            _listitem.setText(f"{_model.value_()} {_model.name}")
-            self.result_list.addItem(_listitem)
+        self.result.search(keystring, keysysid, keyfiltermode)
+
+    def done(self, result):
+        self.debounce.stop()
+        self.result.cancel()
+        super().done(result)
 
     def get_selected_models(self):
-        idxes = [idx.row() for idx in self.result_list.selectedIndexes()]
-        values = [self.result[i].value for i in idxes]
+        idxes = [idx.row() for idx in self.result_list.selectionModel().selectedIndexes()]
+        values = [self.result.value(i) for i in idxes]
         return values
@@ -0,0 +1,119 @@
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+
+
+def _stable(positions: list[int]) -> set[int]:
+    """
+    Indexes into positions of a longest increasing run, these rows keep their place.
+    """
+    tails = []
+    tail_index = []
+    previous = [-1] * len(positions)
+    for i, position in enumerate(positions):
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if tails[mid] < position:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo > 0:
+            previous[i] = tail_index[lo - 1]
+        if lo == len(tails):
+            tails.append(position)
+            tail_index.append(i)
+        else:
+            tails[lo] = position
+            tail_index[lo] = i
+    result = set()
+    i = tail_index[-1] if tail_index else -1
+    while i >= 0:
+        result.add(i)
+        i = previous[i]
+    return result
+
+
+class SentenceListModel(QAbstractListModel):
+    """
+    Numbered sentences of the current model.
+    A new list is applied as removed, moved and inserted rows, so the view keeps its selection
+    and only lays out the rows which changed.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.texts: list[str] = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.texts)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{index.row() + 1}. {self.texts[index.row()]}"
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return self.texts[index.row()]
+        return None
+
+    def set_sentences(self, sentences):
+        """
+        Show the texts of sentences, changing only the rows which differ from the shown ones.
+        """
+        wanted = [x.value for x in sentences]
+        wanted_set = set(wanted)
+        if not wanted_set.intersection(self.texts):
+            # Another model, nothing to keep
+            self.beginResetModel()
+            self.texts = wanted
+            self.endResetModel()
+            return
+        self.__remove(wanted_set)
+        self.__arrange(wanted)
+
+    def __remove(self, wanted: set[str]):
+        """
+        Remove the rows which are not wanted any more, one signal per run of rows, from the bottom.
+        """
+        row = len(self.texts) - 1
+        while row >= 0:
+            if self.texts[row] in wanted:
+                row -= 1
+                continue
+            last = row
+            while row >= 0 and self.texts[row] not in wanted:
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row + 1, last)
+            del self.texts[row + 1:last + 1]
+            self.endRemoveRows()
+
+    def __arrange(self, wanted: list[str]):
+        """
+        Move and insert rows until the shown texts equal wanted.
+        The longest run already in order stays, every other row is placed after its predecessor.
+        """
+        target = {text: i for i, text in enumerate(wanted)}
+        stable = {self.texts[i] for i in _stable([target[x] for x in self.texts])}
+        shown = set(self.texts)
+        t = 0
+        while t < len(wanted):
+            text = wanted[t]
+            if text in stable:
+                t += 1
+                continue
+            after = self.texts.index(wanted[t - 1]) + 1 if t else 0
+            if text in shown:
+                source = self.texts.index(text)
+                if source != after:
+                    self.beginMoveRows(QModelIndex(), source, source, QModelIndex(), after)
+                    self.texts.insert(after if source > after else after - 1, self.texts.pop(source))
+                    self.endMoveRows()
+                t += 1
+                continue
+            # A run of new texts is inserted at once
+            end = t
+            while end < len(wanted) and wanted[end] not in shown:
+                end += 1
+            self.beginInsertRows(QModelIndex(), after, after + end - t - 1)
+            self.texts[after:after] = wanted[t:end]
+            shown.update(wanted[t:end])
+            self.endInsertRows()
+            t = end
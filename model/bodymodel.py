@@ -1,33 +1,78 @@
-from model.sentence import Sentence
+from model.sentence import Sentence, SentenceCollection
 from model.structure import Structure
 
 
+def split_paragraph(paragraph: str):
+    """
+    Split a paragraph into sentence objects, empty sentences are skipped.
+    """
+    length = len(paragraph)
+    # The timing of breaking out of the loop takes advantage of the fact that the find function returns -1
+    left = 0
+    right = 0
+    while left < length and right >= 0:
+        # Obtain the cut-off point in the string from the starting point to the end
+        right = paragraph.find('。\n', left)
+        try:
+            yield Sentence(paragraph[left:right])
+        except ValueError:
+            # Skip empty strings, but do not affect the starting point forward
+            pass
+        left = right + 1
+
+
 class BodyModel(Structure):
-    def __init__(self, value: int, name: str, context: list = None):
+    __slots__ = ("_paragraph", "_sentences", "revision")
+
+    def __init__(self, value: int, name: str, context: list = None, revision: int | None = None):
         super().__init__(value, name, 0)
-        self.paragraph: str = ""
-        self.sentences: list[Sentence] = []
+        # Revision in the database when loaded, None saves without checking for changes of others
+        self.revision = revision
+        # None until the paragraph is rendered from sentences
+        self._paragraph: str | None = None
+        self._sentences = SentenceCollection()
         if context is not None:
-            self.sentences = [Sentence(_str_) for _str_ in context]
-            self.convert_forparagraph()
+            self._sentences.extend(Sentence(_str_) for _str_ in context)
 
     def __getitem__(self, item):
-        if not isinstance(item, int) and abs(item) < len(self.sentences):
+        if not isinstance(item, int):
             raise IndexError
-        return self.sentences[item]
+        return self._sentences[item]
 
     def __len__(self):
-        return len(self.sentences)
+        return len(self._sentences)
+
+    def __iter__(self):
+        return iter(self._sentences)
 
     def __contains__(self, item):
         if isinstance(item, Sentence):
-            return any((x == item for x in self.sentences))
+            return item in self._sentences
         else:
             raise ValueError
 
     @property
-    def paragraph(self):
-        return self.paragraph
+    def sentences(self) -> SentenceCollection:
+        return self._sentences
+
+    @sentences.setter
+    def sentences(self, context):
+        """
+        Replace all sentences with sentence objects.
+        """
+        self._sentences = SentenceCollection(context)
+
+    @property
+    def paragraph(self) -> str:
+        """
+        The text shown in the edit box, rendered from sentences when first needed.
+        """
+        if self._paragraph is None:
+            if len(self._sentences):
+                self._paragraph = "。\n\n".join([x.value for x in self._sentences]) + "。"
+            else:
+                self._paragraph = ''
+        return self._paragraph
 
     @paragraph.setter
     def paragraph(self, text):
@@ -35,67 +80,43 @@ class BodyModel(Structure):
         Assign directly to the paragraph.
         """
         if isinstance(text, str):
-            self.paragraph = text.strip()
+            self._paragraph = text.strip()
 
-    def cleansentences(self):
+    def clean_sentences(self):
         """
         Clean up the sentence list.
         """
-        self.sentences.clear()
+        self._sentences.clear()
 
-    def add_intoparagraph(self, context):
+    def add_into_paragraph(self, context):
         """
         If context is an iterable object containing a sentence object,
-        add text from the sentence object to the paragraph;
+        add text of the sentences missing from the paragraph to the paragraph;
         if context is a string, connect the content directly after the paragraph.
         """
         if isinstance(context, str):
-            self.paragraph += f"\n{context.strip()}"
+            self.paragraph = f"{self.paragraph}\n{context.strip()}"
         else:
-            for new in context:
-                if new.value not in self.paragraph:
-                    self.paragraph += f"\n{new.value}。\n"
+            present = SentenceCollection(split_paragraph(self.paragraph + "\n"))
+            added = [x.value for x in context if present.add(x)]
+            if added:
+                self.paragraph = "".join((self.paragraph, *(f"\n\n{x}。" for x in added)))
 
-    def add_intosentences(self, context):
+    def add_into_sentences(self, context):
         """
-        Add multiple sentence objects.
+        Add multiple sentence objects, sentences already present are skipped.
         """
-        for new in context:
-            for old in self.sentences:
-                if new == old:
-                    break
-            else:
-                self.sentences.append(new)
+        self._sentences.extend(context)
 
-    def convert_forparagraph(self):
+    def convert_for_paragraph(self):
         """
-        Convert sentences of a list of sentences into paragraphs.
+        Convert sentences of a list of sentences into paragraphs, the paragraph is rendered when it is read.
         """
-        if len(self.sentences):
-            self.paragraph = "。\n\n".join([x.value for x in self.sentences])
-            self.paragraph += "。"
-        else:
-            self.paragraph = ''
+        self._paragraph = None
 
-    def convert_intosentences(self):
+    def convert_into_sentences(self):
         """
         Split the paragraph into a list of sentences, the list of sentences will be reset!!!
         """
-        length = len(self.paragraph)
-        assert length
-        self.sentences = []
-        # The timing of breaking out of the loop takes advantage of the fact that the find function returns -1
-        left = 0
-        right = 0
-        while left < length and right >= 0:
-            # Obtain the cut-off point in the string from the starting point to the end
-            right = self.paragraph.find('。\n', left)
-            try:
-                text = Sentence(self.paragraph[left:right])
-            except ValueError:
-                # Skip empty strings, but do not affect the starting point forward
-                pass
-            else:
-                self.sentences.append(text)
-            finally:
-                left = right + 1
+        assert len(self.paragraph)
+        self._sentences = SentenceCollection(split_paragraph(self.paragraph))
@@ -2,6 +2,8 @@ from model.structure import Structure
 
 
 class InfoModel(Structure):
+    __slots__ = ("correspondents",)
+
     def __init__(self, value: int, name: str, pval: int):
         super().__init__(value, name, pval)
         self.correspondents = []
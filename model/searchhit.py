@@ -0,0 +1,20 @@
+from typing import NamedTuple
+from model.structure import Structure
+
+
+class SearchHit(NamedTuple):
+    """
+    Read-only search result, only what a result list shows.
+    source: the field the keywords were found in, see factory.fulltext.
+    rank: relevance inside the source, lower first, 0 when browsing.
+    """
+    value: int
+    name: str
+    source: int
+    rank: float = 0.0
+
+    # The value decoding of Structure only needs self.value
+    gender = Structure.gender
+    sysid = Structure.sysid
+    is_parent = Structure.is_parent
+    value_ = Structure.value_
@@ -2,11 +2,14 @@ import hashlib
 
 
 class Sentence:
+    __slots__ = ("value", "_hash")
+
     def __init__(self, context: str):
         value = context.strip()
         if not len(value):
             raise ValueError
         self.value = value
+        self._hash = None
 
     def __eq__(self, other):
         return self.value == other
@@ -25,7 +28,74 @@ class Sentence:
 
     @property
     def gethash(self):
-        sha256 = hashlib.sha256()
-        sha256.update(self.value.encode('UTF-8'))
-        hashstring = sha256.hexdigest()
-        return hashstring
+        """
+        SHA-256 of the text, computed on first access only.
+        """
+        if self._hash is None:
+            sha256 = hashlib.sha256()
+            sha256.update(self.value.encode('UTF-8'))
+            self._hash = sha256.hexdigest()
+        return self._hash
+
+
+class SentenceCollection:
+    """
+    Sentences in order, indexed by their text.
+    Membership, adding and removing are O(1), positions are listed again only after a removal.
+    """
+    __slots__ = ("_items", "_order")
+
+    def __init__(self, sentences=()):
+        self._items: dict[str, Sentence] = {}
+        self._order: list[Sentence] | None = []
+        self.extend(sentences)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items.values())
+
+    def __contains__(self, item):
+        if isinstance(item, Sentence):
+            item = item.value
+        return item in self._items
+
+    def __getitem__(self, item):
+        if self._order is None:
+            self._order = list(self._items.values())
+        return self._order[item]
+
+    def add(self, sentence: Sentence) -> bool:
+        """
+        Append a sentence unless the same text is present.
+        """
+        if sentence.value in self._items:
+            return False
+        self._items[sentence.value] = sentence
+        if self._order is not None:
+            self._order.append(sentence)
+        return True
+
+    def extend(self, sentences) -> int:
+        """
+        Append many sentences, returns the number actually added.
+        """
+        return sum(self.add(x) for x in sentences)
+
+    def remove(self, sentence: Sentence):
+        del self._items[sentence.value]
+        self._order = None
+
+    def reorder(self, texts):
+        """
+        Put the given texts first in the given order, the others follow in their current order.
+        """
+        items = {x: self._items[x] for x in texts if x in self._items}
+        items.update(self._items)
+        self._items = items
+        self._order = None
+
+    def clear(self):
+        self._items.clear()
+        self._order = []
@@ -1,4 +1,6 @@
 class Structure:
+    __slots__ = ("value", "name", "pval")
+
     def __init__(self, value: int, name: str, pval: int):
         self.value = value
         self.name = name
@@ -0,0 +1,274 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import hashlib
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from factory.bodyfactory import BodyFactory
+from factory.cache import ModelCache
+from factory import columnar
+from model.bodymodel import BodyModel, Sentence
+from model.searchhit import SearchHit
+from pyscript import createdata
+from configuration import MODEL_CACHE_SIZE
+
+
+# Sentence slots (models x sentences per model) of the generated databases
+SCALES = (10000, 100000, 1000000)
+
+
+def build_database(path: str, models: int, sentences: int):
+    """
+    Build a small database, every model links its own sentences.
+    """
+    db = createdata.create_schema(path)
+    values = [(10 + i % 12) * 100000 + i // 12 for i in range(models)]
+    db.executemany(
+        "INSERT INTO info (value,name,pval,sysid,sex,is_parent,info) VALUES (?,?,?,?,?,?,?)",
+        ((v, f"结构{v}（左）", 0, v // 100000 - 10, 0, 0, "") for v in values)
+    )
+    for v in values:
+        texts = [Sentence(f"第{v}号结构的第{i}句描述") for i in range(sentences)]
+        db.executemany(
+            "INSERT INTO attribution (context,text_hash) VALUES (?,?)", ((x.value, x.gethash) for x in texts)
+        )
+        db.executemany(
+            "INSERT INTO ia_connect (model_value,text_hash,order_id) VALUES (?,?,?)",
+            ((v, x.gethash, i) for i, x in enumerate(texts))
+        )
+    db.commit()
+    db.close()
+    return values
+
+
+def legacy_create_by_value(db: sqlite3.Connection, value: int):
+    """
+    The former loader, one query per sentence.
+    """
+    cur = db.cursor()
+    cur.execute("SELECT name FROM info WHERE value=%d" % value)
+    name = cur.fetchone()[0]
+    cur.execute("SELECT text_hash FROM ia_connect WHERE model_value=%d ORDER BY order_id" % value)
+    contexts = []
+    for sentence_hash in [x[0] for x in cur.fetchall()]:
+        cur.execute("SELECT context FROM attribution WHERE text_hash='%s'" % sentence_hash)
+        contexts.append(cur.fetchone()[0])
+    return BodyModel(value, name, contexts)
+
+
+def measure(db: sqlite3.Connection, func, *args):
+    """
+    Run once, return (statements executed, seconds).
+    """
+    statements = []
+    db.set_trace_callback(statements.append)
+    start = time.perf_counter()
+    func(*args)
+    seconds = time.perf_counter() - start
+    db.set_trace_callback(None)
+    return len(statements), seconds
+
+
+def bench_loader(models: int = 50, sentences: int = 80):
+    """
+    Compare the per-model N+1 loader with the batched loader.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "creature.db")
+        values = build_database(path, models, sentences)
+        factory = BodyFactory(path)
+        legacy = measure(factory.db, lambda: [legacy_create_by_value(factory.db, v) for v in values])
+        batched = measure(factory.db, factory.create_many_by_values, values)
+        factory.close()
+    print(f"loader: {models} models x {sentences} sentences")
+    print(f"  legacy : {legacy[0]:6d} queries {legacy[1] * 1000:9.2f} ms")
+    print(f"  batched: {batched[0]:6d} queries {batched[1] * 1000:9.2f} ms")
+
+
+class LegacySentence:
+    """
+    The former dict-backed sentence, hashing on every access.
+    """
+    def __init__(self, context: str):
+        self.value = context.strip()
+
+    @property
+    def gethash(self):
+        return hashlib.sha256(self.value.encode('UTF-8')).hexdigest()
+
+
+class LegacyHit:
+    """
+    The former search result, a dict-backed model with empty sentence lists.
+    """
+    def __init__(self, value: int, name: str):
+        self.value = value
+        self.name = name
+        self.pval = 0
+        self.paragraph = ""
+        self.sentences = []
+
+
+def allocate(func, count: int):
+    """
+    Build count objects, return (kilobytes held, seconds).
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = [func(i) for i in range(count)]
+    seconds = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return size / 1024, seconds
+
+
+def bench_models(count: int = 100000, hash_reads: int = 3):
+    """
+    Memory and time of model objects, and of repeated hash reads.
+    """
+    print(f"models: {count} objects")
+    cases = {
+        "sentence (dict)": lambda i: LegacySentence(f"第{i}句描述"),
+        "sentence (slots)": lambda i: Sentence(f"第{i}句描述"),
+        "search hit (dict model)": lambda i: LegacyHit(i, f"结构{i}"),
+        "search hit (record)": lambda i: SearchHit(i, f"结构{i}", 0),
+    }
+    for label, func in cases.items():
+        size, seconds = allocate(func, count)
+        print(f"  {label:24s}: {size:10.0f} KiB {seconds * 1000:9.2f} ms")
+
+    for label, cls in (("hash (uncached)", LegacySentence), ("hash (cached)", Sentence)):
+        sentences = [cls(f"第{i}句描述") for i in range(count)]
+        start = time.perf_counter()
+        for _ in range(hash_reads):
+            for sentence in sentences:
+                sentence.gethash
+        print(f"  {label:24s}: {hash_reads} reads {(time.perf_counter() - start) * 1000:9.2f} ms")
+
+
+def timed(func, repeat: int) -> dict:
+    """
+    Run func repeat times, return statistics of the seconds taken.
+    """
+    seconds = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        seconds.append(time.perf_counter() - start)
+    return {
+        "repeat": repeat,
+        "min": min(seconds),
+        "median": statistics.median(seconds),
+        "mean": statistics.fmean(seconds),
+        "max": max(seconds),
+    }
+
+
+def bench_factory(path: str, values: list[int], repeat: int, seed: int = 0) -> dict[str, dict]:
+    """
+    Time the operations of BodyFactory on a generated database.
+    """
+    rng = random.Random(seed)
+    samples = rng.sample(values, min(repeat, len(values)))
+    repeat = len(samples)
+    factory = BodyFactory(path)
+    names = {x.value: x.name for x in factory.create_many_by_values(samples)}
+    results = {}
+
+    def _cold(i):
+        factory.cache = ModelCache(MODEL_CACHE_SIZE)
+        factory.create_by_value(samples[i])
+
+    results["create_by_value"] = timed(_cold, repeat)
+    results["create_by_value (cached)"] = timed(lambda i: factory.create_by_value(samples[i]), repeat)
+    results["navigation index"] = timed(lambda i: setattr(factory, "_navigation", None) or factory.navigation, 1)
+    results["setup_model"] = timed(lambda i: factory.setup_model(samples[i], 1 - 2 * (i % 2)), repeat)
+    results["produce_by_search (name)"] = timed(
+        lambda i: list(factory.produce_by_search(names[samples[i]][:3], None, 0)), repeat
+    )
+    results["produce_hits_by_search (page)"] = timed(
+        lambda i: list(factory.produce_hits_by_search(names[samples[i]][1:4], samples[i] // 100000 - 10, 0)), repeat
+    )
+    results["produce_hits_by_search (browse)"] = timed(
+        lambda i: list(factory.produce_hits_by_search("", None, 0)), repeat
+    )
+
+    def _save(i):
+        body = factory.create_by_value(samples[i])
+        body.add_into_sentences([Sentence(f"基准测试第{i}句")])
+        factory.saving_model(body)
+
+    results["saving_model"] = timed(_save, repeat)
+    results["percentage_of_progress_completed"] = timed(
+        lambda i: factory.percentage_of_progress_completed(None, None), repeat
+    )
+    if columnar.available():
+        results["catalog load"] = timed(lambda i: columnar.discard(path) or factory.catalog, 1)
+        results["catalog count"] = timed(
+            lambda i: factory.catalog.count(sysid=i % 12, sex=i % 2, filter_model=2), repeat
+        )
+        results["catalog group_counts"] = timed(lambda i: factory.catalog.group_counts(), repeat)
+
+    with tempfile.TemporaryDirectory() as folder:
+        results["export (ndjson)"] = timed(lambda i: factory.export_database_json(folder, "ndjson"), 1)
+        target = os.path.join(folder, "import.db")
+        createdata.create_schema(target).close()
+        importer = BodyFactory(target)
+        results["import (ndjson)"] = timed(lambda i: importer.import_database_from_json(folder), 1)
+        importer.close()
+    factory.close()
+    return results
+
+
+def bench_scales(scales=SCALES, sentences: int = 10, repeat: int = 20, output: str | None = None) -> dict:
+    """
+    Generate a database per scale and time the factory on it.
+    Results are printed and, with output, written as JSON for comparing runs.
+    """
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "runs": [],
+    }
+    for scale in scales:
+        models = max(scale // sentences, 1)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "creature.db")
+            start = time.perf_counter()
+            values = createdata.generate(path, models, sentences)
+            generated = time.perf_counter() - start
+            size = os.path.getsize(path)
+            results = bench_factory(path, values, repeat)
+        print(f"scale {scale}: {models} models, {size / 1048576:.1f} MiB, generated in {generated:.1f} s")
+        for operation, result in results.items():
+            print(f"  {operation:34s}: median {result['median'] * 1000:10.3f} ms  max {result['max'] * 1000:10.3f} ms")
+            report["runs"].append({
+                "scale": scale, "models": models, "sentences": sentences, "operation": operation, **result
+            })
+    if output:
+        with open(output, "w", encoding="UTF-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks of the factory layer")
+    parser.add_argument("--scales", type=int, nargs="*", default=list(SCALES))
+    parser.add_argument("--sentences", type=int, default=10, help="sentences per model")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="JSON file of the results")
+    parser.add_argument("--micro", action="store_true", help="also compare against the former loader and models")
+    args = parser.parse_args()
+    if args.micro:
+        bench_loader()
+        bench_models()
+    bench_scales(args.scales, args.sentences, args.repeat, args.output)
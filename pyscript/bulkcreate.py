@@ -0,0 +1,41 @@
+import csv
+import sys
+from factory.infofactory import InfoFactory
+
+
+def bulk_create(filename: str, fact: InfoFactory):
+    """
+    从表格导出的csv批量新建结构，列为 name,sysid,is_parent,sex,pval
+    每个分组一次分配value，全部结构在一个事务中插入
+    """
+    with open(filename, "r", encoding="UTF-8-sig", newline="") as f:
+        rows = list(csv.DictReader(f))
+    return create_from_rows(rows, fact)
+
+
+def create_from_rows(rows, fact: InfoFactory):
+    """
+    由字典（键为 name,sysid,is_parent,sex,pval）批量新建结构，返回新建的结构
+    """
+    groups = {}
+    for row in rows:
+        key = (int(row["sysid"]), int(row["is_parent"]), int(row["sex"]))
+        groups.setdefault(key, []).append(row)
+
+    strucs = []
+    for (sysid, is_parent, sex), items in groups.items():
+        for struc, row in zip(fact.generate_new_structures(sysid, is_parent, sex, len(items)), items):
+            struc.name = str(row["name"]).strip()
+            struc.pval = int(row["pval"])
+            strucs.append(struc)
+    try:
+        fact.create_structures(strucs)
+    finally:
+        fact.release_structures(strucs)
+    return strucs
+
+
+if __name__ == '__main__':
+    fact = InfoFactory(*sys.argv[2:3])
+    for item in bulk_create(sys.argv[1], fact):
+        print(item.value, item.name, item.pval)
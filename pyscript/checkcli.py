@@ -0,0 +1,49 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from factory import migration
+from pyscript.benchmark import build_database
+
+
+# Folder of infocli.py
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Models and sentences per model of the baseline database
+MODELS = 24
+SENTENCES = 3
+
+
+def run(path: str, *argv: str) -> list[dict]:
+    """
+    Rows written by infocli for the command line argv on the database at path, fail on a non-zero exit.
+    """
+    result = subprocess.run(
+        [sys.executable, "-m", "infocli", "--db", path, *argv], cwd=ROOT, capture_output=True, encoding="UTF-8"
+    )
+    assert result.returncode == 0, f"{' '.join(argv)}: exit {result.returncode}: {result.stderr.strip()}"
+    return [json.loads(line) for line in result.stdout.splitlines()]
+
+
+def check():
+    """
+    Fail if a reading command of infocli does not work on a database the editor never opened,
+    one with the tables of the editor but none of its migrations.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "creature.db")
+        values = build_database(path, MODELS, SENTENCES)
+        value = str(values[0])
+        models = run(path, "get", value)
+        assert len(models) == 1 and len(models[0]["sentences"]) == SENTENCES, models
+        assert any(x["value"] == values[0] for x in run(path, "search", f"第{values[0]}号"))
+        assert len(run(path, "search", "", "--filter", "2")) == MODELS
+        assert sum(x["total"] for x in run(path, "progress")) == MODELS
+        run(path, "counterpart", value)
+        exported = {x["table"]: x["rows"] for x in run(path, "export", os.path.join(folder, "export"))}
+        assert exported["attribution"] == MODELS * SENTENCES, exported
+    print(f"infocli read a baseline database, schema version {migration.SCHEMA_VERSION}")
+
+
+if __name__ == '__main__':
+    check()
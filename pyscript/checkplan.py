@@ -0,0 +1,89 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+from urllib.request import pathname2url
+from factory.bodyfactory import BodyFactory
+from factory.infofactory import InfoFactory
+from factory import migration
+from model.searchhit import SearchHit
+from pyscript import createdata
+
+
+# Models of the database generated when none is given
+GENERATED_MODELS = 2000
+
+
+def exercise(body: BodyFactory, info: InfoFactory, value: int, name: str, sysid: int):
+    """
+    Run the hot paths of both factories once on existing data.
+    """
+    model = body.setup_model(value, 1)
+    body.create_many_by_values((value, model.value))
+    list(body.produce_sentences_by_value(value))
+    body.saving_model(body.create_by_value(value))
+    body.get_old_info(value)
+    keywords = name[:3] if len(name) >= 3 else name + "描述"
+    for filter_model in (0, 1, 2):
+        for page in (None, SearchHit(value, name, 0), SearchHit(value, name, 2, -1.0)):
+            list(body.produce_hits_by_search(keywords, sysid, filter_model, after=page))
+            list(body.produce_hits_by_search("", sysid, filter_model, after=page))
+    body.percentage_of_progress_completed(sysid, 0)
+    body.counterpart_model(value)
+    info.patrilineal_links((value, model.value))
+    list(info.get_descendants(value))
+    list(info.get_astructure_by_value(value))
+    info.release_structures(info.generate_new_structures(sysid, 0, 0, 2))
+
+
+def copy_database(path: str, target: str):
+    """
+    Copy a database, the source is opened read-only and copied consistently even while in use.
+    """
+    source = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True)
+    copy = sqlite3.connect(target)
+    source.backup(copy)
+    copy.close()
+    source.close()
+
+
+def check(path: str | None = None):
+    """
+    Fail if any hot query of the factories scans a whole table.
+    The queries run on a migrated copy of the database at path, or on a generated database,
+    the given database itself is never written.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        target = os.path.join(folder, "creature.db")
+        if path is None:
+            createdata.generate(target, GENERATED_MODELS)
+        else:
+            copy_database(path, target)
+        check_copy(target)
+
+
+def check_copy(path: str):
+    body = BodyFactory(path)
+    info = InfoFactory(path)
+    cur = body.db.cursor()
+    cur.execute("SELECT value,name,sysid FROM info ORDER BY value LIMIT 1")
+    sample = cur.fetchone()
+    statements = []
+    body.db.set_trace_callback(statements.append)
+    try:
+        exercise(body, info, *sample)
+    finally:
+        body.db.set_trace_callback(None)
+    problems = migration.query_plan_problems(body.db, statements)
+    info.close()
+    body.close()
+    for sql, detail in problems:
+        print(f"{detail}\n    {sql}")
+    assert not problems, f"{len(problems)} queries scan whole tables"
+    print(f"{len(set(statements))} statements checked, schema version {migration.SCHEMA_VERSION}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check the query plans of the factories for full table scans")
+    parser.add_argument("path", nargs="?", help="database checked through a copy, a generated one by default")
+    check(parser.parse_args().path)
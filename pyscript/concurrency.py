@@ -0,0 +1,102 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from factory import revision
+from factory.bodyfactory import BodyFactory
+from factory.revision import RevisionConflict
+from model.sentence import Sentence
+from pyscript import createdata
+
+
+def editor(path: str, values: list[int], edits: int, think: float, seed: int) -> dict:
+    """
+    One editor process: load a model, think, add a sentence and save, a conflict is counted and edited again.
+    """
+    rng = random.Random(seed)
+    factory = BodyFactory(path)
+    saved = conflicts = 0
+    retried = revision.retried
+    start = time.perf_counter()
+    for i in range(edits):
+        value = rng.choice(values)
+        while True:
+            body = factory.create_by_value(value)
+            time.sleep(think * rng.random())
+            body.add_into_sentences([Sentence(f"编辑者{seed}的第{i}次修改")])
+            try:
+                factory.saving_model(body)
+            except RevisionConflict:
+                conflicts += 1
+                continue
+            saved += 1
+            break
+    seconds = time.perf_counter() - start
+    factory.close()
+    return {"saved": saved, "conflicts": conflicts, "retried": revision.retried - retried, "seconds": seconds}
+
+
+def _editor(args):
+    return editor(*args)
+
+
+def run(editors: int = 4, edits: int = 50, hot: int = 20, think: float = 0.005, models: int = 2000) -> dict:
+    """
+    editors processes edit the hot first models of one generated database at the same time.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "creature.db")
+        values = createdata.generate(path, models)[:hot]
+        before = linked_sentences(path, values)
+        # Spawned processes open their own connections, nothing is inherited
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(editors) as pool:
+            results = pool.map(_editor, [(path, values, edits, think, seed) for seed in range(editors)])
+        # Starting the processes is not counted
+        seconds = max(x["seconds"] for x in results)
+        after = linked_sentences(path, values)
+
+    saved = sum(x["saved"] for x in results)
+    conflicts = sum(x["conflicts"] for x in results)
+    return {
+        "editors": editors, "edits": edits, "hot_models": hot, "think_seconds": think,
+        "saved": saved,
+        "conflicts": conflicts,
+        "conflict_rate": conflicts / (saved + conflicts) if saved + conflicts else 0,
+        "lock_retries": sum(x["retried"] for x in results),
+        "saves_per_second": saved / seconds if seconds else 0,
+        "seconds": seconds,
+        # Every save added one sentence, none may be lost
+        "lost_updates": saved - (after - before),
+    }
+
+
+def linked_sentences(path: str, values: list[int]) -> int:
+    factory = BodyFactory(path)
+    count = sum(len(x) for x in factory.load_many_by_values(values))
+    factory.close()
+    return count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Editors saving the same database at the same time")
+    parser.add_argument("--editors", type=int, nargs="*", default=[1, 2, 4, 8])
+    parser.add_argument("--edits", type=int, default=50, help="saves per editor")
+    parser.add_argument("--hot", type=int, default=20, help="number of models all editors work on")
+    parser.add_argument("--think", type=float, default=0.005, help="longest pause between load and save")
+    parser.add_argument("--output", help="JSON file of the results")
+    args = parser.parse_args()
+    report = []
+    for count in args.editors:
+        result = run(count, args.edits, args.hot, args.think)
+        report.append(result)
+        print(
+            f"{count:3d} editors: {result['saves_per_second']:8.1f} saves/s "
+            f"conflicts {result['conflict_rate'] * 100:5.1f}% lock retries {result['lock_retries']}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="UTF-8") as f:
+            json.dump(report, f, indent=1)
@@ -0,0 +1,172 @@
+import argparse
+import os
+import random
+import sqlite3
+from factory import migration
+from model.sentence import Sentence
+from configuration import DATABASE_PATH, SYSTEMS
+
+
+SCHEMA = (
+    "CREATE TABLE info (value INTEGER PRIMARY KEY, name TEXT, pval INTEGER, "
+    "sysid INTEGER, sex INTEGER, is_parent INTEGER, info TEXT)",
+    "CREATE TABLE ia_connect (model_value INTEGER, text_hash TEXT, order_id INTEGER)",
+    "CREATE TABLE attribution (context TEXT, text_hash TEXT)",
+    "CREATE TABLE info_old_info (value INTEGER, info TEXT)",
+)
+
+# Characters names and sentences are made of, roughly in the proportion they appear in real names
+_ROOTS = "骨肌腱膜神经动静脉淋巴结管腺囊窦孔窝嵴突板弓支干丛束核叶段"
+_PLACES = "上下前后内外中侧深浅近远左右背腹颈胸腰骶尾颅面眶鼻耳舌咽喉"
+_QUALIFIERS = ("（左）", "（右）", "（中）", "（前）", "（后）")
+# Length of the name before the qualifier -> weight
+NAME_LENGTHS = {2: 10, 3: 25, 4: 30, 5: 20, 6: 10, 8: 5}
+
+BATCH_SIZE = 10000
+
+
+def create_schema(path: str) -> sqlite3.Connection:
+    """
+    An empty database with the tables of the editor, indexes and triggers are added by migrate.
+    """
+    db = sqlite3.connect(path)
+    for sql in SCHEMA:
+        db.execute(sql)
+    return db
+
+
+def random_name(rng: random.Random, lengths: dict[int, int] = NAME_LENGTHS) -> str:
+    length = rng.choices(list(lengths), weights=list(lengths.values()))[0]
+    chars = [rng.choice(_PLACES if i % 2 == 0 else _ROOTS) for i in range(length)]
+    return "".join(chars) + rng.choice(_QUALIFIERS)
+
+
+def random_sentence(rng: random.Random, serial: int) -> str:
+    # The serial keeps generated sentences unique
+    words = "".join(rng.choice(_PLACES + _ROOTS) for _ in range(rng.randint(8, 30)))
+    return f"{words}第{serial}条"
+
+
+def model_values(models: int, parents: float) -> list[tuple[int, int, int, int]]:
+    """
+    (value, sysid, sex, is_parent) of models spread evenly over every system and gender.
+    """
+    buckets = [(sysid, sex) for sysid in range(len(SYSTEMS) - 1) for sex in (0, 1)]
+    parent_count = int(models * parents)
+    if parent_count > 999 * len(buckets) or models - parent_count > 10000 * len(buckets):
+        raise ValueError("模型数量超出value范围")
+    result = []
+    for i in range(models):
+        is_parent = int(i < parent_count)
+        sysid, sex = buckets[i % len(buckets)]
+        n = (i if is_parent else i - parent_count) // len(buckets)
+        if is_parent:
+            value = (sysid + 10) * 10000 + sex * 1000 + n + 1
+        else:
+            value = (sysid + 10) * 100000 + sex * 10000 + n
+        result.append((value, sysid, sex, is_parent))
+    return result
+
+
+def generate(
+        path: str, models: int, sentences: int = 10, shared: float = 0.2, parents: float = 0.05,
+        completed: float = 0.7, old_info: float = 0.3, seed: int = 0,
+        lengths: dict[int, int] = NAME_LENGTHS
+) -> list[int]:
+    """
+    Build a database of models with random Chinese names, sentences and old info.
+    sentences: sentences per completed model, the others have none;
+    shared: share of sentence links reusing a sentence of another model;
+    parents: share of parent structures, the children point to a parent of their system and gender.
+    Returns the values of the models.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    db = create_schema(path)
+    db.execute("PRAGMA journal_mode=OFF")
+    db.execute("PRAGMA synchronous=OFF")
+
+    items = model_values(models, parents)
+    heads = {}
+    for value, sysid, sex, is_parent in items:
+        if is_parent:
+            heads.setdefault((sysid, sex), []).append(value)
+
+    def _info():
+        for value, sysid, sex, is_parent in items:
+            pval = 0 if is_parent else rng.choice(heads.get((sysid, sex), [0]))
+            yield value, random_name(rng, lengths), pval, sysid, sex, is_parent, ""
+
+    def _old_info():
+        for value, *_ in items:
+            if rng.random() < old_info:
+                yield value, "；".join(random_sentence(rng, value) for _ in range(rng.randint(1, 3)))
+
+    pool = []
+
+    def _connect():
+        serial = 0
+        for value, *_ in items:
+            if rng.random() >= completed:
+                continue
+            linked = set()
+            for order_id in range(sentences):
+                if pool and rng.random() < shared:
+                    text_hash = rng.choice(pool)
+                else:
+                    serial += 1
+                    sentence = Sentence(random_sentence(rng, serial))
+                    text_hash = sentence.gethash
+                    pool.append(text_hash)
+                    yield "attribution", (sentence.value, text_hash)
+                if text_hash not in linked:
+                    linked.add(text_hash)
+                    yield "ia_connect", (value, text_hash, order_id)
+
+    with db:
+        _insert(db, "INSERT INTO info (value,name,pval,sysid,sex,is_parent,info) VALUES (?,?,?,?,?,?,?)", _info())
+        _insert(db, "INSERT INTO info_old_info (value,info) VALUES (?,?)", _old_info())
+        rows = {"attribution": [], "ia_connect": []}
+        sql = {
+            "attribution": "INSERT INTO attribution (context,text_hash) VALUES (?,?)",
+            "ia_connect": "INSERT INTO ia_connect (model_value,text_hash,order_id) VALUES (?,?,?)",
+        }
+        for table, row in _connect():
+            rows[table].append(row)
+            if len(rows[table]) >= BATCH_SIZE:
+                db.executemany(sql[table], rows[table])
+                rows[table].clear()
+        for table, batch in rows.items():
+            db.executemany(sql[table], batch)
+    # Indexes, full-text index and progress counters are built once over the whole data
+    migration.migrate(db)
+    db.close()
+    return [x[0] for x in items]
+
+
+def _insert(db: sqlite3.Connection, sql: str, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            db.executemany(sql, batch)
+            batch.clear()
+    db.executemany(sql, batch)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate a synthetic creature.db")
+    parser.add_argument("path", nargs="?", default=DATABASE_PATH)
+    parser.add_argument("--models", type=int, default=10000)
+    parser.add_argument("--sentences", type=int, default=10, help="sentences per completed model")
+    parser.add_argument("--shared", type=float, default=0.2, help="share of reused sentences")
+    parser.add_argument("--parents", type=float, default=0.05, help="share of parent structures")
+    parser.add_argument("--completed", type=float, default=0.7, help="share of models having sentences")
+    parser.add_argument("--old-info", type=float, default=0.3, help="share of models having old info")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    values = generate(
+        args.path, args.models, args.sentences, args.shared, args.parents, args.completed, args.old_info, args.seed
+    )
+    print(f"{args.path}: {len(values)} models")
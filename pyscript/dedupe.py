@@ -0,0 +1,30 @@
+import argparse
+import json
+import sqlite3
+from factory import schema
+from configuration import DATABASE_PATH
+
+
+def dedupe(path: str, delete: bool):
+    """
+    List the duplicated rows which keep a database from being migrated, and delete them if asked.
+    """
+    db = sqlite3.connect(path)
+    if delete:
+        removed = schema.remove_duplicates(db)
+    else:
+        removed = {table: schema.duplicates(db, table, columns) for table, columns in schema.UNIQUE_INDEXES.values()}
+    db.close()
+    for table, rows in removed.items():
+        for row in rows:
+            print(json.dumps({"table": table, "row": row}, ensure_ascii=False))
+    action = "deleted" if delete else "found, run again with --delete to remove them"
+    print(f"{sum(len(x) for x in removed.values())} duplicated rows {action}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Duplicated rows of databases written by older versions")
+    parser.add_argument("path", nargs="?", default=DATABASE_PATH)
+    parser.add_argument("--delete", action="store_true", help="delete them, the earliest row is kept")
+    args = parser.parse_args()
+    dedupe(args.path, args.delete)
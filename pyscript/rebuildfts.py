@@ -0,0 +1,20 @@
+import sys
+import sqlite3
+from factory import fulltext
+from configuration import DATABASE_PATH
+
+
+def rebuild(path: str):
+    """
+    Rebuild the full-text index of an existing database.
+    """
+    db = sqlite3.connect(path)
+    fulltext.rebuild(db)
+    cur = db.cursor()
+    cur.execute("SELECT COUNT(*) FROM info_fts")
+    print(f"{path}: {cur.fetchone()[0]} models indexed")
+    db.close()
+
+
+if __name__ == '__main__':
+    rebuild(sys.argv[1] if len(sys.argv) > 1 else DATABASE_PATH)
@@ -10,8 +10,7 @@ def task1():
         print(i, item.value, item.name)
     numorder = input("Num of order (base-1): ")
     numorder = int(numorder)
-    pval = allitem[numorder].pval
-    for item in fact.patrilineal_link(pval):
+    for item in fact.patrilineal_link(allitem[numorder]):
         print(item.value, item.name)
 
 
@@ -31,5 +30,14 @@ def task2():
         fact.create_structure(new_sturc)
 
 
+def task3():
+    fact = InfoFactory()
+    # 显示全部子孙结构
+    key_value = int(input("Value: "))
+    for item in fact.get_descendants(key_value):
+        print(item.value, item.name, item.pval)
+    print("Depth:", fact.depth(key_value))
+
+
 if __name__ == '__main__':
     task2()